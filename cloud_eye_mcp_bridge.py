@@ -1,9 +1,13 @@
 import os
-import subprocess
+import hmac
+import functools
+import asyncio
+import anyio
 import httpx
 from pathlib import Path
-from typing import Optional, List
-from fastapi import FastAPI, HTTPException, Header
+from typing import Optional, List, Tuple, Iterator
+from fastapi import FastAPI, APIRouter, HTTPException, Header, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
@@ -34,16 +38,22 @@ API_TOKEN = os.environ.get("CLOUD_EYE_API_TOKEN", "wuji-neigong-2026")
 async def verify_token(authorization: Optional[str] = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
-    token = authorization.replace("Bearer ", "")
-    if token != API_TOKEN:
+    token = authorization[len("Bearer "):]
+    if not hmac.compare_digest(token.encode(), API_TOKEN.encode()):
         raise HTTPException(status_code=403, detail="Invalid API token")
 
+# Every git/fs/railway route sits behind verify_token via its router
+git_router = APIRouter(prefix="/git", dependencies=[Depends(verify_token)])
+fs_router = APIRouter(prefix="/fs", dependencies=[Depends(verify_token)])
+railway_router = APIRouter(prefix="/railway", dependencies=[Depends(verify_token)])
+
 # ============================================================================
 # Git Models & Helpers
 # ============================================================================
 class GitCommitRequest(BaseModel):
     message: str
     repo_path: Optional[str] = None
+    include_untracked: bool = True  # False → single `git commit -a` (tracked files only)
 
 class GitPushRequest(BaseModel):
     remote: str = "origin"
@@ -53,6 +63,7 @@ class GitPushRequest(BaseModel):
 class FileReadRequest(BaseModel):
     path: str
     repo_path: Optional[str] = None
+    stream: bool = False
 
 class FileWriteRequest(BaseModel):
     path: str
@@ -67,10 +78,88 @@ class RailwayDeploymentRequest(BaseModel):
     project_id: Optional[str] = None
     limit: int = 5
 
+# Resolved once at import — the bridge never changes its working directory
+DEFAULT_REPO_PATH = Path.cwd().resolve()
+
+@functools.lru_cache(maxsize=64)
+def _resolve_repo_path(custom_path: str) -> Path:
+    return Path(custom_path).resolve()
+
 def get_repo_path(custom_path: Optional[str] = None) -> Path:
     if custom_path:
-        return Path(custom_path).resolve()
-    return Path.cwd()
+        return _resolve_repo_path(custom_path)
+    return DEFAULT_REPO_PATH
+
+async def run_git(args: List[str], cwd: Path, timeout: float) -> Tuple[int, str, str]:
+    """Run a git command without blocking the event loop. Returns (returncode, stdout, stderr)."""
+    proc = await asyncio.create_subprocess_exec(
+        "git", *args,
+        cwd=str(cwd),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise TimeoutError(f"git {args[0]} timed out after {timeout}s")
+    return proc.returncode, out.decode("utf-8", errors="replace"), err.decode("utf-8", errors="replace")
+
+# Files above this size are streamed by /fs/read instead of inlined into JSON
+FS_STREAM_THRESHOLD = 1 << 20
+FS_CHUNK_SIZE = 65536
+
+def resolve_safe_path(repo_path: Optional[str], rel_path: str) -> Path:
+    """Resolve rel_path under the repo root, rejecting anything that escapes it."""
+    base = get_repo_path(repo_path)
+    file_path = (base / rel_path).resolve()
+    if not file_path.is_relative_to(base):
+        raise HTTPException(status_code=403, detail="Path traversal not allowed")
+    return file_path
+
+def iter_file(file_path: Path, chunk_size: int = FS_CHUNK_SIZE) -> Iterator[bytes]:
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+# ============================================================================
+# Railway Client (shared — one multiplexed HTTP/2 session to backboard)
+# ============================================================================
+RAILWAY_API_URL = "https://backboard.railway.app"
+RAILWAY_CLIENT: Optional[httpx.AsyncClient] = None
+_RAILWAY_CLIENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+def _railway_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use (or if the event loop
+    changed) — works without lifespan events, e.g. when mounted in another app."""
+    global RAILWAY_CLIENT, _RAILWAY_CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if RAILWAY_CLIENT is None or _RAILWAY_CLIENT_LOOP is not loop or RAILWAY_CLIENT.is_closed:
+        try:
+            import h2  # noqa: F401  (httpx[http2])
+            http2 = True
+        except ImportError:
+            http2 = False
+        RAILWAY_CLIENT = httpx.AsyncClient(
+            http2=http2,
+            base_url=RAILWAY_API_URL,
+            timeout=15.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            headers={"Content-Type": "application/json"}
+        )
+        _RAILWAY_CLIENT_LOOP = loop
+    return RAILWAY_CLIENT
+
+@app.on_event("shutdown")
+async def _close_railway_client():
+    global RAILWAY_CLIENT, _RAILWAY_CLIENT_LOOP
+    client, RAILWAY_CLIENT, _RAILWAY_CLIENT_LOOP = RAILWAY_CLIENT, None, None
+    if client is not None:
+        await client.aclose()
 
 # ============================================================================
 # Endpoints
@@ -97,110 +186,130 @@ def health_check():
         "modules": modules
     }
 
-@app.get("/git/status")
-def git_status(repo_path: Optional[str] = None, authorization: Optional[str] = Header(None)):
-    if authorization != f"Bearer {API_TOKEN}": return {"error": "Unauthorized"}
+@git_router.get("/status")
+async def git_status(repo_path: Optional[str] = None):
     try:
         path = get_repo_path(repo_path)
-        result = subprocess.run(
-            ["git", "status", "--porcelain"],
-            cwd=path,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+        returncode, stdout, _ = await run_git(["status", "--porcelain"], path, timeout=10)
         return {
-            "status": result.stdout,
-            "clean": len(result.stdout.strip()) == 0,
-            "returncode": result.returncode
+            "status": stdout,
+            "clean": len(stdout.strip()) == 0,
+            "returncode": returncode
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/git/commit")
-def git_commit(req: GitCommitRequest, authorization: Optional[str] = Header(None)):
-    if authorization != f"Bearer {API_TOKEN}": return {"error": "Unauthorized"}
+@git_router.post("/commit")
+async def git_commit(req: GitCommitRequest):
     try:
         path = get_repo_path(req.repo_path)
-        subprocess.run(["git", "add", "."], cwd=path, check=True, timeout=10)
-        result = subprocess.run(
-            ["git", "commit", "-m", req.message],
-            cwd=path,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+        if req.include_untracked:
+            add_rc, _, add_err = await run_git(["add", "."], path, timeout=10)
+            if add_rc != 0:
+                raise RuntimeError(f"git add failed: {add_err.strip()}")
+            returncode, stdout, _ = await run_git(["commit", "-m", req.message], path, timeout=10)
+        else:
+            # One process: stage tracked changes and commit together
+            returncode, stdout, _ = await run_git(["commit", "-a", "-m", req.message], path, timeout=10)
         return {
-            "success": result.returncode == 0,
-            "output": result.stdout,
+            "success": returncode == 0,
+            "output": stdout,
             "message": req.message
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/git/push")
-def git_push(req: GitPushRequest, authorization: Optional[str] = Header(None)):
-    if authorization != f"Bearer {API_TOKEN}": return {"error": "Unauthorized"}
+@git_router.post("/push")
+async def git_push(req: GitPushRequest):
     try:
         path = get_repo_path(req.repo_path)
-        result = subprocess.run(
-            ["git", "push", req.remote, req.branch],
-            cwd=path,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        returncode, stdout, stderr = await run_git(["push", req.remote, req.branch], path, timeout=30)
         return {
-            "success": result.returncode == 0,
-            "output": result.stdout + result.stderr
+            "success": returncode == 0,
+            "output": stdout + stderr
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/fs/read")
-def fs_read(req: FileReadRequest, authorization: Optional[str] = Header(None)):
-    if authorization != f"Bearer {API_TOKEN}": return {"error": "Unauthorized"}
+@fs_router.post("/read")
+async def fs_read(req: FileReadRequest):
     try:
-        base = get_repo_path(req.repo_path)
-        file_path = (base / req.path).resolve()
-        if not str(file_path).startswith(str(base)):
-            raise HTTPException(status_code=403, detail="Path traversal not allowed")
-        content = file_path.read_text(encoding="utf-8")
+        file_path = resolve_safe_path(req.repo_path, req.path)
+        size = (await anyio.to_thread.run_sync(file_path.stat)).st_size
+        if req.stream or size > FS_STREAM_THRESHOLD:
+            # Raw chunks, no JSON wrapping — keeps peak memory at one chunk
+            return StreamingResponse(iter_file(file_path), media_type="text/plain; charset=utf-8")
+        content = await anyio.to_thread.run_sync(lambda: file_path.read_text(encoding="utf-8"))
         return {"path": req.path, "content": content}
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/fs/write")
-def fs_write(req: FileWriteRequest, authorization: Optional[str] = Header(None)):
-    if authorization != f"Bearer {API_TOKEN}": return {"error": "Unauthorized"}
+@fs_router.post("/write")
+async def fs_write(req: FileWriteRequest):
     try:
-        base = get_repo_path(req.repo_path)
-        file_path = (base / req.path).resolve()
-        if not str(file_path).startswith(str(base)):
-            raise HTTPException(status_code=403, detail="Path traversal not allowed")
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(req.content, encoding="utf-8")
+        file_path = resolve_safe_path(req.repo_path, req.path)
+        def _write():
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(req.content, encoding="utf-8")
+        await anyio.to_thread.run_sync(_write)
         return {"path": req.path, "success": True, "size": len(req.content)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/railway/query")
-async def railway_graphql(req: RailwayQueryRequest, authorization: Optional[str] = Header(None)):
-    if authorization != f"Bearer {API_TOKEN}": return {"error": "Unauthorized"}
+@fs_router.post("/write/stream")
+async def fs_write_stream(request: Request, path: str, repo_path: Optional[str] = None):
+    """Write the raw request body to `path` chunk by chunk (for large files)."""
+    try:
+        file_path = resolve_safe_path(repo_path, path)
+        def _open():
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            return open(file_path, "wb")
+        f = await anyio.to_thread.run_sync(_open)
+        size = 0
+        try:
+            async for chunk in request.stream():
+                if chunk:
+                    await anyio.to_thread.run_sync(f.write, chunk)
+                    size += len(chunk)
+        finally:
+            f.close()
+        return {"path": path, "success": True, "size": size}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@railway_router.post("/query")
+async def railway_graphql(req: RailwayQueryRequest):
     token = os.environ.get("RAILWAY_TOKEN")
     if not token:
         raise HTTPException(status_code=500, detail="RAILWAY_TOKEN not configured")
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            "https://backboard.railway.app/graphql/v2",
-            json={"query": req.query, "variables": req.variables},
-            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-            timeout=15.0
-        )
-        return resp.json()
+    resp = await _railway_client().post(
+        "/graphql/v2",
+        json={"query": req.query, "variables": req.variables},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    return resp.json()
+
+app.include_router(git_router)
+app.include_router(fs_router)
+app.include_router(railway_router)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Multi-worker uvicorn on Windows runs the selector event loop, which
+    # can't spawn subprocesses (run_git / PowerShell sessions) — stay at one.
+    workers = 1 if os.name == "nt" else int(os.environ.get("WEB_CONCURRENCY", 1))
+    # loop/http "auto" already pick uvloop/httptools when they're installed
+    uvicorn.run(
+        "cloud_eye_mcp_bridge:app",
+        host="0.0.0.0",
+        port=port,
+        workers=workers
+    )
@@ -10,81 +10,177 @@ Or run standalone:
     python run_librarian2.py
 """
 import asyncio
+import hashlib
 import json
 from datetime import datetime, timezone
 from typing import Optional
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.responses import PlainTextResponse, JSONResponse
 
-from .scanner import full_scan, RealitySnapshot
-from .detector import detect_illusions
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as JSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from .scanner import full_scan, close_http_client, HTTPX_AVAILABLE, RealitySnapshot
+from .db import ensure_indexes, ensure_wal
+from .config import LIBRARIAN_DB, SAPPHIRE_DB
+from .detector import load_current_focus_entries, analyze_entries
 from .engine import synthesize, OrientationBriefing
 
 
 # ─── Cache (single-scan cache to avoid hammering services) ────────────────────
 _cached_briefing: Optional[OrientationBriefing] = None
 _cached_at: Optional[datetime] = None
+_cached_etag: Optional[str] = None
+_cached_json_bytes: bytes = b""
+_cached_text_bytes: bytes = b""
+_cached_text_headers: dict = {}
 CACHE_TTL_SECONDS = 60  # re-scan after 60s
+REFRESH_AHEAD_SECONDS = 50  # past this age, re-scan in the background
+_scan_lock = asyncio.Lock()  # single-flight: one full_scan at a time
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def _cache_age(now: datetime) -> Optional[float]:
+    if _cached_briefing is None or _cached_at is None:
+        return None
+    return (now - _cached_at).total_seconds()
 
 
 async def _get_briefing(force_refresh: bool = False) -> OrientationBriefing:
-    global _cached_briefing, _cached_at
+    if not force_refresh:
+        age = _cache_age(datetime.now(timezone.utc))
+        if age is not None and age < CACHE_TTL_SECONDS:
+            if age >= REFRESH_AHEAD_SECONDS:
+                _schedule_refresh_ahead()
+            return _cached_briefing
+
+    async with _scan_lock:
+        # Double-checked: another request may have rescanned while we waited
+        if not force_refresh:
+            age = _cache_age(datetime.now(timezone.utc))
+            if age is not None and age < CACHE_TTL_SECONDS:
+                return _cached_briefing
+        return await _rescan()
+
+
+def _schedule_refresh_ahead() -> None:
+    """Kick off a background rescan so callers keep hitting a warm cache."""
+    global _refresh_task
+    if _scan_lock.locked() or (_refresh_task is not None and not _refresh_task.done()):
+        return
+    _refresh_task = asyncio.create_task(_refresh_ahead())
+
+
+async def _refresh_ahead() -> None:
+    async with _scan_lock:
+        age = _cache_age(datetime.now(timezone.utc))
+        if age is not None and age < REFRESH_AHEAD_SECONDS:
+            return
+        try:
+            await _rescan()
+        except Exception as e:
+            print(f"[Librarian 2.0] Background refresh failed: {e}")
+
+
+async def _rescan() -> OrientationBriefing:
+    """Run a full scan and repopulate the cache. Caller holds _scan_lock."""
+    global _cached_briefing, _cached_at, _cached_etag
+    global _cached_json_bytes, _cached_text_bytes, _cached_text_headers
     now = datetime.now(timezone.utc)
-    if (
-        not force_refresh
-        and _cached_briefing is not None
-        and _cached_at is not None
-        and (now - _cached_at).total_seconds() < CACHE_TTL_SECONDS
-    ):
-        return _cached_briefing
-
-    reality = await full_scan()
-    claims = detect_illusions(reality)
+    # The SQLite read doesn't depend on the scan — overlap it with the probes
+    entries_task = asyncio.create_task(asyncio.to_thread(load_current_focus_entries))
+    try:
+        reality = await full_scan()
+    finally:
+        entries = await entries_task
+    claims = analyze_entries(entries, reality)
     briefing = synthesize(reality, claims)
     _cached_briefing = briefing
-    _cached_at = now
+    _cached_at = datetime.fromisoformat(reality.scanned_at)  # as fresh as the data, not the rebuild
+    _cached_etag = '"%s"' % hashlib.md5(now.isoformat().encode()).hexdigest()
+    # Serialize once per cache generation; endpoints just hand out the bytes
+    _cached_json_bytes = _encode_json(_briefing_dict(briefing))
+    _cached_text_bytes = briefing.text_report.encode("utf-8")
+    _cached_text_headers = {**_cache_headers(), "Content-Length": str(len(_cached_text_bytes))}
     return briefing
 
 
+def _encode_json(payload: dict) -> bytes:
+    """Same encoding JSONResponse uses, done ahead of time."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def _briefing_dict(briefing: OrientationBriefing) -> dict:
+    return {
+        "generated_at": briefing.generated_at,
+        "scan_duration_ms": briefing.scan_duration_ms,
+        "warning_level": briefing.warning_level,
+        "git": briefing.git_summary,
+        "services": briefing.service_summary,
+        "librarian": briefing.librarian_summary,
+        "sapphire": briefing.sapphire_summary,
+        "filesystem": briefing.filesystem_summary,
+        "illusions": [
+            {"type": c.claim_type, "claim": c.claim_text,
+             "severity": c.severity, "actual": c.actual_value,
+             "note": c.note}
+            for c in briefing.illusions
+        ],
+        "unverifiable_count": len(briefing.unverifiable),
+        "verified_count": len(briefing.verified_claims),
+        "current_focus": briefing.current_focus_entries[:5],
+        "work_order": briefing.active_work_order,
+        "next_action": briefing.next_action,
+        "text_report": briefing.text_report,
+    }
+
+
+def _cache_headers() -> dict:
+    return {"ETag": _cached_etag or "", "Cache-Control": f"max-age={CACHE_TTL_SECONDS}"}
+
+
+def _not_modified(request: Request) -> bool:
+    """True when the client's If-None-Match already names the current cache generation."""
+    inm = request.headers.get("if-none-match")
+    if not inm or _cached_etag is None:
+        return False
+    tags = [t.strip() for t in inm.split(",")]
+    return "*" in tags or _cached_etag in tags or f"W/{_cached_etag}" in tags
+
+
 # ─── Router ───────────────────────────────────────────────────────────────────
 
 def build_router():
     from fastapi import APIRouter
-    router = APIRouter(prefix="/orient", tags=["librarian2"])
+    router = APIRouter(prefix="/orient", tags=["librarian2"],
+                       default_response_class=JSONResponse)
 
     @router.get("/briefing", response_class=PlainTextResponse,
                 summary="Full orientation briefing — text format, ideal for instance startup")
-    async def get_briefing_text(refresh: bool = Query(False, description="Force re-scan")):
+    async def get_briefing_text(request: Request,
+                                refresh: bool = Query(False, description="Force re-scan")):
         briefing = await _get_briefing(force_refresh=refresh)
-        return PlainTextResponse(briefing.text_report)
+        if _not_modified(request):
+            return Response(status_code=304, headers=_cache_headers())
+        return Response(_cached_text_bytes, media_type="text/plain; charset=utf-8",
+                        headers=_cached_text_headers)
 
     @router.get("/briefing.json",
                 summary="Full orientation briefing — JSON format")
-    async def get_briefing_json(refresh: bool = Query(False)):
+    async def get_briefing_json(request: Request, refresh: bool = Query(False)):
         briefing = await _get_briefing(force_refresh=refresh)
-        return JSONResponse({
-            "generated_at": briefing.generated_at,
-            "scan_duration_ms": briefing.scan_duration_ms,
-            "warning_level": briefing.warning_level,
-            "git": briefing.git_summary,
-            "services": briefing.service_summary,
-            "librarian": briefing.librarian_summary,
-            "sapphire": briefing.sapphire_summary,
-            "filesystem": briefing.filesystem_summary,
-            "illusions": [
-                {"type": c.claim_type, "claim": c.claim_text,
-                 "severity": c.severity, "actual": c.actual_value,
-                 "note": c.note}
-                for c in briefing.illusions
-            ],
-            "unverifiable_count": len(briefing.unverifiable),
-            "verified_count": len(briefing.verified_claims),
-            "current_focus": briefing.current_focus_entries[:5],
-            "work_order": briefing.active_work_order,
-            "next_action": briefing.next_action,
-            "text_report": briefing.text_report,
-        })
+        if _not_modified(request):
+            return Response(status_code=304, headers=_cache_headers())
+        return Response(_cached_json_bytes, media_type="application/json",
+                        headers=_cache_headers())
 
     @router.get("/scan",
                 summary="Raw reality snapshot — git, services, filesystem, DBs")
@@ -131,4 +227,16 @@ def mount_librarian2(app: FastAPI):
     """Mount Librarian 2.0 routes onto an existing FastAPI app."""
     router = build_router()
     app.include_router(router)
+
+    @app.on_event("startup")
+    async def _librarian2_prepare_dbs():
+        for db in (LIBRARIAN_DB, SAPPHIRE_DB):
+            await asyncio.to_thread(ensure_wal, db)
+            await asyncio.to_thread(ensure_indexes, db)
+
+    @app.on_event("shutdown")
+    async def _librarian2_close_client():
+        if HTTPX_AVAILABLE:
+            await close_http_client()
+
     print("[Librarian 2.0] Mounted at /orient/*")
@@ -40,6 +40,9 @@ HTTP_TIMEOUT = 8          # seconds per service probe
 SCAN_CURRENT_FOCUS_LIMIT = 20   # how many current-focus entries to analyse
 SCAN_ESSENCE_LIMIT = 10         # top essence entries to include in briefing
 ILLUSION_RECENT_HOURS = 72      # only scan entries from the last N hours for illusions
+# Skip system/global gitconfig for scanner git calls (saves config parsing on
+# every spawn). Off by default: safe.directory etc. live in those files.
+GIT_ISOLATE_CONFIG = os.environ.get("LIBRARIAN2_GIT_ISOLATE_CONFIG", "0") == "1"
 
 # ─── API ──────────────────────────────────────────────────────────────────────
 PORT = int(os.environ.get("LIBRARIAN2_PORT", 8556))
@@ -0,0 +1,149 @@
+"""
+Librarian 2.0 — SQLite access
+Every read the scanner, detector and engine make goes through a connection
+opened here, so they all share the same tuning.
+
+Wu Xing: Wood — roots that feed every branch from one source.
+"""
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Applied to every read-only connection. journal_mode / synchronous are
+# writer-side settings and can't be changed through a mode=ro handle.
+RO_PRAGMAS = (
+    "PRAGMA query_only=1",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",       # ~20 MB page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",     # 256 MB memory-mapped reads
+)
+
+
+def open_ro(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a read-only connection to db_path with the tuned PRAGMAs applied."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5,
+                           check_same_thread=check_same_thread)
+    for pragma in RO_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# ─── Read Connection Pool ─────────────────────────────────────────────────────
+# One long-lived connection per DB path, each with its own lock so the
+# scanner/detector/engine threads never share a handle mid-query.
+_RO_CONNS: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
+_RO_LOCK = threading.Lock()
+
+
+@contextmanager
+def ro_conn(db_path: Path) -> Iterator[sqlite3.Connection]:
+    """
+    Borrow the pooled read-only connection for db_path (opened on first use).
+    Set row_factory on cursors, not on the shared connection. A connection
+    that raises out of the block is closed and reopened on next use.
+    """
+    key = str(db_path)
+    with _RO_LOCK:
+        entry = _RO_CONNS.get(key)
+        if entry is None:
+            entry = (open_ro(db_path, check_same_thread=False), threading.Lock())
+            _RO_CONNS[key] = entry
+    conn, lock = entry
+    with lock:
+        try:
+            yield conn
+        except Exception:
+            _discard(key, conn)
+            raise
+
+
+def _discard(key: str, conn: sqlite3.Connection) -> None:
+    with _RO_LOCK:
+        if key in _RO_CONNS and _RO_CONNS[key][0] is conn:
+            del _RO_CONNS[key]
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+@atexit.register
+def close_all() -> None:
+    """Close every pooled connection (runs at interpreter exit)."""
+    with _RO_LOCK:
+        entries = list(_RO_CONNS.values())
+        _RO_CONNS.clear()
+    for conn, _ in entries:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def ensure_wal(db_path: Path) -> Optional[str]:
+    """
+    Switch a DB to WAL journaling (persistent in the file) so the read-only
+    probes here never block on — or block — guidance writers.
+    Returns the resulting journal mode, or None if the DB is missing/locked.
+    """
+    if not db_path.exists():
+        return None
+    try:
+        conn = sqlite3.connect(str(db_path), timeout=5)
+        try:
+            mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            conn.execute("PRAGMA synchronous=NORMAL")  # per-connection; writers must set their own
+            return mode
+        finally:
+            conn.close()
+    except Exception:
+        return None
+
+
+# Indexes for the orient queries: every librarian2 read filters
+# architect_guidance by priority and orders by created_at, and the Sapphire
+# probes sort/filter on observed_at and adjustment_applied.
+_INDEXES = {
+    "architect_guidance": (
+        "CREATE INDEX IF NOT EXISTS idx_guidance_priority_ts "
+        "ON architect_guidance(priority, created_at DESC)",
+    ),
+    "routing_observations": (
+        "CREATE INDEX IF NOT EXISTS idx_routing_obs_ts "
+        "ON routing_observations(observed_at DESC)",
+    ),
+    "detected_patterns": (
+        "CREATE INDEX IF NOT EXISTS idx_patterns_applied "
+        "ON detected_patterns(adjustment_applied)",
+    ),
+}
+
+
+def ensure_indexes(db_path: Path) -> List[str]:
+    """
+    Create the read-path indexes on whichever of their tables exist in db_path
+    (idempotent). Returns the tables that were indexed; [] if the DB is
+    missing/locked.
+    """
+    if not db_path.exists():
+        return []
+    try:
+        conn = sqlite3.connect(str(db_path), timeout=5)
+        try:
+            tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            done = []
+            with conn:
+                for table, statements in _INDEXES.items():
+                    if table in tables:
+                        for sql in statements:
+                            conn.execute(sql)
+                        done.append(table)
+            return done
+        finally:
+            conn.close()
+    except Exception:
+        return []
@@ -8,14 +8,14 @@ This is the core innovation: the Librarian can now see its own blindspots.
 Wu Xing: Water — depth, hidden patterns, what flows beneath the surface.
 """
 import re
-import sqlite3
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
 
 from .config import LIBRARIAN_DB, SCAN_CURRENT_FOCUS_LIMIT, ILLUSION_RECENT_HOURS
 from .scanner import RealitySnapshot
+from .db import ro_conn
 
 
 # ─── Verdict Types ────────────────────────────────────────────────────────────
@@ -30,7 +30,7 @@ SEVERITY_MEDIUM = "MEDIUM"
 SEVERITY_LOW    = "LOW"
 
 
-@dataclass
+@dataclass(slots=True)
 class Claim:
     """A single extractable assertion from a guidance entry."""
     entry_id: str
@@ -62,71 +62,106 @@ RE_FILE_CLAIM = re.compile(r'(?:committed|deployed|created|exists|saved).*?([A-Z
 # Untracked file mention
 RE_UNTRACKED = re.compile(r'untracked files.*?:\s*(.+)', re.IGNORECASE)
 
+# Fused extractor: every claim pattern above in a single lookahead alternation,
+# so extract_claims walks each entry once. The alternatives start with disjoint
+# keywords, so at most one can match at any position; the lookahead keeps the
+# scan from consuming text another claim type still needs to see.
+_CLAIM_TYPES = ("git_commit", "service_health", "bug_active", "file_exists")
+_CLAIM_ALTERNATIVES = {
+    "git_commit":     r'(?P<git_commit>(?:master|HEAD|branch|commit|at)\s+(?P<commit_hash>[0-9a-f]{7,10})\b)',
+    "service_health": r'(?P<service_health>(?P<service_name>lxr-5|coach|cloudeye-lxr|cloudeye-ui)[^\n]*:\s*(?:UP|LIVE|healthy|running|operational))',
+    "bug_active":     r'(?P<bug_active>(?:BUG\s*\d+|no such table|no such column|attribute.*get|sqlite3\.Row).*)',
+    "file_exists":    r'(?P<file_exists>(?:committed|deployed|created|exists|saved).*?(?P<file_name>[A-Za-z0-9_\-/\\]+\.(?:py|md|js|ts|jsx|sql|toml|json))\b)',
+}
+RE_CLAIMS = re.compile(
+    "(?=" + "|".join(_CLAIM_ALTERNATIVES[t] for t in _CLAIM_TYPES) + ")", re.IGNORECASE)
+# Same scan minus the bug alternative, for entries that aren't bug inventories
+RE_CLAIMS_NO_BUGS = re.compile(
+    "(?=" + "|".join(_CLAIM_ALTERNATIVES[t] for t in _CLAIM_TYPES if t != "bug_active") + ")", re.IGNORECASE)
+
+# Bug claims only count in "BEFORE STATE" / bug-inventory entries; plain
+# literals, so a substring test on lowered content beats an IGNORECASE regex
+BUG_KEYWORDS = ("bug inventory", "known runtime", "before state", "runtime bugs")
+
+
+# RE_CLAIMS only ever captures these four literals, so the mapping is exact
+_SERVICE_NAMES = {
+    "lxr-5":        "lxr-5",
+    "coach":        "coach",
+    "cloudeye-lxr": "lxr",
+    "cloudeye-ui":  "ui",
+}
 
-def _service_name_normalize(raw: str) -> Optional[str]:
-    raw = raw.lower()
-    if "lxr-5" in raw or "lxr5" in raw:   return "lxr-5"
-    if "coach" in raw:                      return "coach"
-    if "cloudeye-lxr" in raw:              return "lxr"
-    if "cloudeye-ui" in raw or "ui" in raw: return "ui"
-    return None
 
+def _service_name_normalize(raw: str) -> Optional[str]:
+    return _SERVICE_NAMES.get(raw.lower())
 
-def extract_claims(entry_id: str, priority: str, content: str) -> List[Claim]:
-    claims: List[Claim] = []
 
-    # 1. Git commit claims
-    for m in RE_COMMIT_CONTEXT.finditer(content):
-        commit = m.group(1).lower()
-        claims.append(Claim(
+def extract_claims(entry_id: str, priority: str, content: str,
+                   seen: Optional[Set[Tuple[str, str]]] = None) -> List[Claim]:
+    """
+    Extract verifiable claims from one guidance entry.
+    Claims whose (claim_type, expected_value[:40]) key is already in `seen` are
+    skipped; pass the same set across entries to deduplicate while extracting.
+    """
+    if seen is None:
+        seen = set()
+
+    content_lower = content.lower()
+    bug_context = any(k in content_lower for k in BUG_KEYWORDS)
+    pattern = RE_CLAIMS if bug_context else RE_CLAIMS_NO_BUGS
+
+    # One pass over the content; results are bucketed by type so claims keep
+    # their historical order (commits, services, bugs, files).
+    buckets: Dict[str, List[Claim]] = {t: [] for t in _CLAIM_TYPES}
+    resume_at = dict.fromkeys(_CLAIM_TYPES, 0)
+
+    def add(claim_type: str, claim_text: str, expected_value: str,
+            severity: str = SEVERITY_LOW) -> None:
+        key = (claim_type, expected_value[:40])
+        if key in seen:
+            return
+        seen.add(key)
+        buckets[claim_type].append(Claim(
             entry_id=entry_id,
             entry_priority=priority,
-            claim_type="git_commit",
-            claim_text=m.group(0),
-            expected_value=commit,
+            claim_type=claim_type,
+            claim_text=claim_text,
+            expected_value=expected_value,
             verdict=UNVERIFIABLE,  # filled in by verify()
+            severity=severity,
         ))
 
-    # 2. Service health claims  
-    for m in RE_SERVICE_UP.finditer(content):
-        sname = _service_name_normalize(m.group(1))
-        if sname:
-            claims.append(Claim(
-                entry_id=entry_id,
-                entry_priority=priority,
-                claim_type="service_health",
-                claim_text=m.group(0),
-                expected_value=f"{sname}:UP",
-                verdict=UNVERIFIABLE,
-            ))
-
-    # 3. Active bug claims (if entry is a "BEFORE STATE" or bug inventory)
-    if re.search(r'BUG INVENTORY|KNOWN RUNTIME|BEFORE STATE|runtime bugs', content, re.IGNORECASE):
-        for m in RE_BUG_ACTIVE.finditer(content):
-            claims.append(Claim(
-                entry_id=entry_id,
-                entry_priority=priority,
-                claim_type="bug_active",
-                claim_text=m.group(0)[:120],
-                expected_value="bug:present",
-                verdict=UNVERIFIABLE,
-                severity=SEVERITY_HIGH,
-            ))
-
-    # 4. File existence claims
-    for m in RE_FILE_CLAIM.finditer(content):
-        fname = m.group(1)
-        if len(fname) > 4:  # skip trivial matches
-            claims.append(Claim(
-                entry_id=entry_id,
-                entry_priority=priority,
-                claim_type="file_exists",
-                claim_text=m.group(0)[:120],
-                expected_value=fname,
-                verdict=UNVERIFIABLE,
-            ))
-
-    return claims
+    for m in pattern.finditer(content):
+        claim_type = m.lastgroup
+        start = m.start(claim_type)
+        # Emulate per-pattern finditer: matches of one type never overlap
+        if start < resume_at[claim_type]:
+            continue
+        resume_at[claim_type] = m.end(claim_type)
+        text = m.group(claim_type)
+
+        # 1. Git commit claims
+        if claim_type == "git_commit":
+            add(claim_type, text, m.group("commit_hash").lower())
+
+        # 2. Service health claims
+        elif claim_type == "service_health":
+            sname = _service_name_normalize(m.group("service_name"))
+            if sname:
+                add(claim_type, text, f"{sname}:UP")
+
+        # 3. Active bug claims
+        elif claim_type == "bug_active":
+            add(claim_type, text[:120], "bug:present", SEVERITY_HIGH)
+
+        # 4. File existence claims
+        elif claim_type == "file_exists":
+            fname = m.group("file_name")
+            if len(fname) > 4:  # skip trivial matches
+                add(claim_type, text[:120], fname)
+
+    return [c for t in _CLAIM_TYPES for c in buckets[t]]
 
 
 # ─── Verification ─────────────────────────────────────────────────────────────
@@ -135,23 +170,25 @@ def verify_claims(claims: List[Claim], reality: RealitySnapshot) -> List[Claim]:
     """Cross-reference each claim against the reality snapshot."""
     verified: List[Claim] = []
 
+    # Built once per pass rather than once per git_commit claim
+    commit_index = [((g.head_oid or g.head_commit).lower(), g.head_commit, r)
+                    for r, g in reality.git.items() if g.head_commit]
+    actual_commits = str({r: head for _, head, r in commit_index})
+
     for claim in claims:
 
         # ── git_commit ────────────────────────────────────────────────────────
         if claim.claim_type == "git_commit":
-            matched = False
-            for repo_name, git in reality.git.items():
-                if git.head_commit and git.head_commit.lower().startswith(claim.expected_value.lower()):
-                    claim.verdict = VERIFIED
-                    claim.actual_value = git.head_commit
-                    claim.note = f"Matches {repo_name} HEAD"
-                    matched = True
-                    break
-            if not matched:
+            expected = claim.expected_value.lower()
+            match = next(((head, r) for head_lower, head, r in commit_index if head_lower.startswith(expected)), None)
+            if match is not None:
+                claim.verdict = VERIFIED
+                claim.actual_value = match[0]
+                claim.note = f"Matches {match[1]} HEAD"
+            else:
                 # Check if any repo HEAD is different from the claimed commit
-                actual_commits = {r: g.head_commit for r, g in reality.git.items() if g.head_commit}
                 claim.verdict = ILLUSION
-                claim.actual_value = str(actual_commits)
+                claim.actual_value = actual_commits
                 claim.severity = SEVERITY_MEDIUM
                 claim.note = "Commit not found as HEAD in any known repo"
 
@@ -209,27 +246,27 @@ def verify_claims(claims: List[Claim], reality: RealitySnapshot) -> List[Claim]:
 
 # ─── Load from Librarian ──────────────────────────────────────────────────────
 
+# Fixed SQL text so the pooled connection's statement cache prepares it once
+_SQL_FOCUS_ENTRIES = """
+    SELECT id, priority, category, content
+    FROM architect_guidance
+    WHERE priority IN ('current focus', 'current_focus', 'essence')
+    AND (created_at > ? OR priority LIKE '%current%')
+    ORDER BY
+      CASE priority WHEN 'current focus' THEN 0 WHEN 'current_focus' THEN 0 ELSE 1 END,
+      created_at DESC
+    LIMIT ?
+"""
+
+
 def load_current_focus_entries(db_path: Path = LIBRARIAN_DB) -> List[Tuple[str, str, str, str]]:
     """Returns list of (id, priority, category, content) for current-focus entries."""
     if not db_path.exists():
         return []
     cutoff = (datetime.now(timezone.utc) - timedelta(hours=ILLUSION_RECENT_HOURS)).isoformat()
     try:
-        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5)
-        c = conn.cursor()
-        c.execute("""
-            SELECT id, priority, category, content
-            FROM architect_guidance
-            WHERE priority IN ('current focus', 'current_focus', 'essence')
-            AND (created_at > ? OR priority LIKE '%current%')
-            ORDER BY
-              CASE priority WHEN 'current focus' THEN 0 WHEN 'current_focus' THEN 0 ELSE 1 END,
-              created_at DESC
-            LIMIT ?
-        """, (cutoff, SCAN_CURRENT_FOCUS_LIMIT + 10))
-        rows = c.fetchall()
-        conn.close()
-        return rows
+        with ro_conn(db_path) as conn:
+            return conn.execute(_SQL_FOCUS_ENTRIES, (cutoff, SCAN_CURRENT_FOCUS_LIMIT + 10)).fetchall()
     except Exception:
         return []
 
@@ -244,21 +281,19 @@ def detect_illusions(reality: RealitySnapshot) -> List[Claim]:
     3. Cross-reference against reality
     4. Return sorted list: ILLUSION first, then UNVERIFIABLE, then VERIFIED
     """
-    entries = load_current_focus_entries()
-    all_claims: List[Claim] = []
+    return analyze_entries(load_current_focus_entries(), reality)
 
-    for entry_id, priority, category, content in entries:
-        claims = extract_claims(str(entry_id), priority, content)
-        all_claims.extend(claims)
 
-    # Deduplicate by (claim_type, expected_value)
-    seen = set()
+def analyze_entries(entries: List[Tuple[str, str, str, str]], reality: RealitySnapshot) -> List[Claim]:
+    """
+    Steps 2–4 of detect_illusions on already-loaded entries, so callers can
+    fetch entries from SQLite while the reality scan is still running.
+    """
+    # Deduplicate by (claim_type, expected_value) while extracting
+    seen: Set[Tuple[str, str]] = set()
     unique_claims: List[Claim] = []
-    for c in all_claims:
-        key = (c.claim_type, c.expected_value[:40])
-        if key not in seen:
-            seen.add(key)
-            unique_claims.append(c)
+    for entry_id, priority, category, content in entries:
+        unique_claims.extend(extract_claims(str(entry_id), priority, content, seen))
 
     verified = verify_claims(unique_claims, reality)
 
@@ -5,18 +5,21 @@ grounded briefing that a new instance can act on immediately.
 
 Wu Xing: Earth — synthesis, grounding, integration. What is actually here.
 """
+import io
 import sqlite3
+from contextlib import closing
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass, field
 
 from .config import LIBRARIAN_DB, SCAN_ESSENCE_LIMIT, SAPPHIRE_DB
-from .scanner import RealitySnapshot, GitState, ServiceState
+from .db import ro_conn
+from .scanner import RealitySnapshot, GitState, ServiceState, KEY_FORGE, KEY_PNS
 from .detector import Claim, VERIFIED, ILLUSION, UNVERIFIABLE, SEVERITY_HIGH, SEVERITY_MEDIUM
 
 
-@dataclass
+@dataclass(slots=True)
 class OrientationBriefing:
     generated_at: str
     scan_duration_ms: float
@@ -53,7 +56,7 @@ def _git_line(name: str, g: GitState) -> str:
     status = []
     if g.staged:    status.append(f"{len(g.staged)} staged")
     if g.modified:  status.append(f"{len(g.modified)} modified")
-    if g.untracked: status.append(f"{len(g.untracked)} untracked")
+    if g.untracked: status.append(f"{len(g.untracked)}{'+' if g.untracked_truncated else ''} untracked")
     clean = "clean" if not status else ", ".join(status)
     ab = f" [{g.ahead_behind}]" if g.ahead_behind and g.ahead_behind != "0\t0" else ""
     return f"{name}: {g.head_commit} ({g.branch or '?'}, {clean}){ab}"
@@ -66,24 +69,33 @@ def _svc_line(name: str, s: ServiceState) -> str:
     return f"{name}: ✗ DOWN — {s.error or 'unreachable'}"
 
 
-def _load_current_focus(db_path: Path, limit: int = 8) -> List[Dict]:
+# Fixed SQL text so the pooled connection's statement cache prepares each once
+_SQL_CURRENT_FOCUS = """
+    SELECT id, priority, category, substr(content, 1, 400) AS preview,
+           created_at
+    FROM architect_guidance
+    WHERE priority IN ('current focus', 'current_focus')
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+_SQL_ESSENCE = """
+    SELECT substr(content, 1, 200)
+    FROM architect_guidance
+    WHERE priority = 'essence'
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+
+
+def _load_current_focus(db_path: Path, limit: int = 5) -> List[Dict]:
+    # 5 = most ever shown (briefing.json returns 5, the text report 3)
     if not db_path.exists():
         return []
     try:
-        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute("""
-            SELECT id, priority, category, substr(content, 1, 400) AS preview,
-                   created_at
-            FROM architect_guidance
-            WHERE priority IN ('current focus', 'current_focus')
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (limit,))
-        rows = [dict(r) for r in c.fetchall()]
-        conn.close()
-        return rows
+        with ro_conn(db_path) as conn, closing(conn.cursor()) as c:
+            c.row_factory = sqlite3.Row
+            c.execute(_SQL_CURRENT_FOCUS, (limit,))
+            return [dict(r) for r in c.fetchall()]
     except Exception as e:
         return [{"error": str(e)}]
 
@@ -92,32 +104,24 @@ def _load_essence_snapshot(db_path: Path, limit: int = SCAN_ESSENCE_LIMIT) -> Li
     if not db_path.exists():
         return []
     try:
-        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5)
-        c = conn.cursor()
-        c.execute("""
-            SELECT substr(content, 1, 200)
-            FROM architect_guidance
-            WHERE priority = 'essence'
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (limit,))
-        rows = [r[0] for r in c.fetchall()]
-        conn.close()
-        return rows
+        with ro_conn(db_path) as conn, closing(conn.cursor()) as c:
+            c.execute(_SQL_ESSENCE, (limit,))
+            return [r[0] for r in c.fetchall()]
     except Exception:
         return []
 
 
-def _derive_work_order(reality: RealitySnapshot, illusions: List[Claim]) -> tuple:
+def _derive_work_order(reality: RealitySnapshot, illusions: List[Claim],
+                       down_svcs: List[str]) -> tuple:
     """
     Derive a plain-English work order and next action from reality.
+    down_svcs is the unreachable-service list synthesize() already built.
     Returns (work_order_text, next_action_text).
     """
     lines = []
     next_action = "Review current focus entries in Librarian and orient to system state."
 
     # Critical: any service DOWN?
-    down_svcs = [name for name, s in reality.services.items() if not s.reachable]
     if down_svcs:
         lines.append(f"⚠ CRITICAL: Services unreachable: {', '.join(down_svcs)}")
         next_action = f"Investigate why {down_svcs[0]} is unreachable — check Railway logs"
@@ -131,19 +135,20 @@ def _derive_work_order(reality: RealitySnapshot, illusions: List[Claim]) -> tupl
     # Untracked files in coach repo
     coach_git = reality.git.get("coach")
     if coach_git and coach_git.untracked:
-        lines.append(f"🟡 {len(coach_git.untracked)} untracked files in coach repo — commit or discard:")
+        more = "+" if coach_git.untracked_truncated else ""
+        lines.append(f"🟡 {len(coach_git.untracked)}{more} untracked files in coach repo — commit or discard:")
         for f in coach_git.untracked[:4]:
             lines.append(f"   {f}")
 
     # Bonsai Forge status
-    forge_exists = reality.filesystem.get("omni/path_tau/README.md", False)
+    forge_exists = reality.filesystem.get(KEY_FORGE, False)
     if not forge_exists:
         lines.append("🟡 Bonsai Forge (Path Tau) scaffold NOT committed to omni-os-blueprint")
         if next_action.startswith("Review"):
             next_action = "Download path_tau_scaffold.ps1 from Telegram (~msg 622), execute, commit to omni-os-blueprint"
 
     # PNS appendix
-    pns_exists = reality.filesystem.get("coach/APPENDIX_PERSISTENCE_NERVOUS_SYSTEM.md", False)
+    pns_exists = reality.filesystem.get(KEY_PNS, False)
     if not pns_exists:
         lines.append("🟡 APPENDIX_PERSISTENCE_NERVOUS_SYSTEM.md not yet committed to coach repo")
         if next_action.startswith("Review"):
@@ -165,80 +170,103 @@ def _warning_level(illusions: List[Claim], down_svcs: List[str]) -> str:
     return "GREEN"
 
 
+# ─── Text Report Layout ───────────────────────────────────────────────────────
+# Static borders/headers, built once (each ends in the newline that follows it)
+_SECTION_EQ = "═" * 68
+_BORDER_TOP = "╔" + "═" * 66 + "╗\n"
+_BORDER_BOT = "╚" + "═" * 66 + "╝\n"
+_TITLE_LINE = "║  LIBRARIAN 2.0 — ORIENTATION BRIEFING                           ║\n"
+_HDR_REALITY = "── REALITY SCAN ─────────────────────────────────────────────────\n"
+_HDR_WORK_ORDER = "\n── ACTIVE WORK ORDER ────────────────────────────────────────────\n"
+_HDR_NEXT_ACTION = "\n── NEXT ACTION ──────────────────────────────────────────────────\n"
+_RULE_ILLUSIONS = "──────────────────────────────"
+_RULE_FOCUS = "────────────────────────────────────"
+_FOOTER = (f"\n{_SECTION_EQ}\n"
+           "  The Dragon who reads this sees what is real, not what was recorded.\n"
+           f"{_SECTION_EQ}")
+
+
 def _build_text_report(briefing: "OrientationBriefing") -> str:
     ts = briefing.generated_at[:19].replace("T", " ")
-    lines = [
-        f"╔══════════════════════════════════════════════════════════════════╗",
-        f"║  LIBRARIAN 2.0 — ORIENTATION BRIEFING                           ║",
-        f"║  {ts} UTC    scan: {briefing.scan_duration_ms:.0f}ms    ║",
-        f"╚══════════════════════════════════════════════════════════════════╝",
-        f"",
-        f"── REALITY SCAN ─────────────────────────────────────────────────",
-    ]
-
-    lines.append("GIT REPOS:")
-    for repo, summary in briefing.git_summary.items():
-        lines.append(f"  {summary}")
-
-    lines.append("\nRAILWAY SERVICES:")
-    for svc, summary in briefing.service_summary.items():
-        lines.append(f"  {summary}")
-
-    lines.append(f"\nLIBRARIAN DB: {briefing.librarian_summary}")
-    lines.append(f"SAPPHIRE DB:  {briefing.sapphire_summary}")
-
-    lines.append("\nKEY FILES:")
+    buf = io.StringIO()
+    w = buf.write
+
+    w(_BORDER_TOP)
+    w(_TITLE_LINE)
+    w(f"║  {ts} UTC    scan: {briefing.scan_duration_ms:.0f}ms    ║\n")
+    w(_BORDER_BOT)
+    w("\n")
+    w(_HDR_REALITY)
+
+    w("GIT REPOS:\n")
+    for summary in briefing.git_summary.values():
+        w(f"  {summary}\n")
+
+    w("\nRAILWAY SERVICES:\n")
+    for summary in briefing.service_summary.values():
+        w(f"  {summary}\n")
+
+    w(f"\nLIBRARIAN DB: {briefing.librarian_summary}\n")
+    w(f"SAPPHIRE DB:  {briefing.sapphire_summary}\n")
+
+    w("\nKEY FILES:\n")
     for fname, exists in briefing.filesystem_summary.items():
-        icon = "✓" if exists else "✗"
-        lines.append(f"  {icon} {fname}")
+        w(f"  {'✓' if exists else '✗'} {fname}\n")
 
     # Illusions
-    lines.append(f"\n── ILLUSION REPORT  [{briefing.warning_level}] ──────────────────────────────")
+    w(f"\n── ILLUSION REPORT  [{briefing.warning_level}] {_RULE_ILLUSIONS}\n")
     if not briefing.illusions:
-        lines.append("  ✅ No confirmed illusions detected.")
+        w("  ✅ No confirmed illusions detected.\n")
     else:
         for ill in briefing.illusions[:6]:
-            lines.append(f"  ⚠ [{ill.severity}] {ill.claim_type}: {ill.claim_text[:70]}")
+            w(f"  ⚠ [{ill.severity}] {ill.claim_type}: {ill.claim_text[:70]}\n")
             if ill.actual_value:
-                lines.append(f"     actual: {ill.actual_value[:70]}")
+                w(f"     actual: {ill.actual_value[:70]}\n")
 
     if briefing.unverifiable:
-        lines.append(f"\n  UNVERIFIABLE ({len(briefing.unverifiable)} claims — require manual check):")
+        w(f"\n  UNVERIFIABLE ({len(briefing.unverifiable)} claims — require manual check):\n")
         for u in briefing.unverifiable[:4]:
-            lines.append(f"    ? {u.claim_type}: {u.claim_text[:70]}")
+            w(f"    ? {u.claim_type}: {u.claim_text[:70]}\n")
             if u.note:
-                lines.append(f"      note: {u.note}")
+                w(f"      note: {u.note}\n")
 
     # Work Order
-    lines.append(f"\n── ACTIVE WORK ORDER ────────────────────────────────────────────")
-    lines.append(briefing.active_work_order)
+    w(_HDR_WORK_ORDER)
+    w(briefing.active_work_order)
+    w("\n")
 
-    lines.append(f"\n── NEXT ACTION ──────────────────────────────────────────────────")
-    lines.append(f"  → {briefing.next_action}")
+    w(_HDR_NEXT_ACTION)
+    w(f"  → {briefing.next_action}\n")
 
     # Current Focus (top 3)
     if briefing.current_focus_entries:
-        lines.append(f"\n── CURRENT FOCUS (latest {min(3, len(briefing.current_focus_entries))}) ────────────────────────────────────")
+        w(f"\n── CURRENT FOCUS (latest {min(3, len(briefing.current_focus_entries))}) {_RULE_FOCUS}\n")
         for entry in briefing.current_focus_entries[:3]:
             if "error" in entry:
                 continue
-            lines.append(f"\n  [{entry.get('created_at', '')[:16]}] [{entry.get('category', '')}]")
-            lines.append(f"  {entry.get('preview', '')[:300]}")
+            w(f"\n  [{entry.get('created_at', '')[:16]}] [{entry.get('category', '')}]\n")
+            w(f"  {entry.get('preview', '')[:300]}\n")
 
-    lines.append(f"\n{'═'*68}")
-    lines.append("  The Dragon who reads this sees what is real, not what was recorded.")
-    lines.append(f"{'═'*68}")
-
-    return "\n".join(lines)
+    w(_FOOTER)
+    return buf.getvalue()
 
 
 # ─── Main API ─────────────────────────────────────────────────────────────────
 
-def synthesize(reality: RealitySnapshot, illusion_claims: List[Claim]) -> OrientationBriefing:
-    """Build the full OrientationBriefing from a reality snapshot and illusion report."""
+def synthesize(reality: RealitySnapshot, illusion_claims: List[Claim],
+               include_essence: bool = False) -> OrientationBriefing:
+    """
+    Build the full OrientationBriefing from a reality snapshot and illusion report.
+    Essence previews aren't rendered anywhere, so they're only loaded on request.
+    """
 
     git_summary = {name: _git_line(name, g) for name, g in reality.git.items()}
-    svc_summary = {name: _svc_line(name, s) for name, s in reality.services.items()}
+    svc_summary = {}
+    down_svcs = []
+    for name, s in reality.services.items():
+        svc_summary[name] = _svc_line(name, s)
+        if not s.reachable:
+            down_svcs.append(name)
 
     lib = reality.librarian
     lib_summary = (
@@ -253,17 +281,20 @@ def synthesize(reality: RealitySnapshot, illusion_claims: List[Claim]) -> Orient
         if sap.readable else f"UNAVAILABLE — {sap.error}"
     )
 
-    illusions   = [c for c in illusion_claims if c.verdict == ILLUSION]
-    unverif     = [c for c in illusion_claims if c.verdict == UNVERIFIABLE]
-    verified    = [c for c in illusion_claims if c.verdict == VERIFIED]
+    # One pass over the claims, bucketed by verdict
+    illusions, unverif, verified = [], [], []
+    by_verdict = {ILLUSION: illusions, UNVERIFIABLE: unverif, VERIFIED: verified}
+    for c in illusion_claims:
+        bucket = by_verdict.get(c.verdict)
+        if bucket is not None:
+            bucket.append(c)
 
-    down_svcs   = [name for name, s in reality.services.items() if not s.reachable]
     warn_level  = _warning_level(illusions, down_svcs)
 
     current_focus = _load_current_focus(LIBRARIAN_DB)
-    essence_snap  = _load_essence_snapshot(LIBRARIAN_DB)
+    essence_snap  = _load_essence_snapshot(LIBRARIAN_DB) if include_essence else []
 
-    work_order, next_action = _derive_work_order(reality, illusion_claims)
+    work_order, next_action = _derive_work_order(reality, illusion_claims, down_svcs)
 
     briefing = OrientationBriefing(
         generated_at=reality.scanned_at,
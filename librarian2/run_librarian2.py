@@ -16,13 +16,19 @@ import sys
 import asyncio
 import argparse
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
+
 
 def run_once(as_json: bool = False):
     """Perform a single scan and print the report, then exit."""
     from scanner import full_scan
     from detector import detect_illusions
     from engine import synthesize
-    import json as jsonlib
 
     async def _run():
         reality = await full_scan()
@@ -33,7 +39,6 @@ def run_once(as_json: bool = False):
     briefing = asyncio.run(_run())
 
     if as_json:
-        import json as jlib
         out = {
             "generated_at": briefing.generated_at,
             "warning_level": briefing.warning_level,
@@ -44,7 +49,12 @@ def run_once(as_json: bool = False):
             "work_order": briefing.active_work_order,
             "next_action": briefing.next_action,
         }
-        print(jlib.dumps(out, indent=2))
+        if ORJSON_AVAILABLE:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(orjson.dumps(out, option=orjson.OPT_INDENT_2))
+            sys.stdout.buffer.write(b"\n")
+        else:
+            print(json.dumps(out, indent=2))
     else:
         print(briefing.text_report)
 
@@ -6,13 +6,17 @@ Returns ground truth that the Illusion Detector compares against recorded belief
 Wu Xing: Metal — precision, harvest, what is actually present.
 """
 import subprocess
+import threading
 import asyncio
 import sqlite3
 import json
+import os
 import re
+import time
+from contextlib import closing
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass, field
 
 try:
@@ -22,25 +26,28 @@ except ImportError:
     HTTPX_AVAILABLE = False
     import urllib.request
 
-from .config import REPOS, SERVICES, HTTP_TIMEOUT, LIBRARIAN_DB, SAPPHIRE_DB
+from .config import REPOS, SERVICES, HTTP_TIMEOUT, LIBRARIAN_DB, SAPPHIRE_DB, GIT_ISOLATE_CONFIG
+from .db import ro_conn
 
 
 # ─── Data Structures ──────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True)
 class GitState:
     repo_name: str
     repo_path: Path
     available: bool
     head_commit: Optional[str] = None
+    head_oid: Optional[str] = None       # full SHA, for prefix-matching claims
     branch: Optional[str] = None
     untracked: List[str] = field(default_factory=list)
+    untracked_truncated: bool = False    # more than UNTRACKED_LIMIT untracked files
     modified: List[str] = field(default_factory=list)
     staged: List[str] = field(default_factory=list)
     ahead_behind: Optional[str] = None
     error: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class ServiceState:
     name: str
     url: str
@@ -51,7 +58,7 @@ class ServiceState:
     health_detail: Optional[dict] = None
     error: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class LibrarianState:
     db_path: Path
     readable: bool
@@ -62,7 +69,7 @@ class LibrarianState:
     embedding_coverage_pct: float = 0.0
     error: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class SapphireState:
     db_path: Path
     readable: bool
@@ -72,7 +79,7 @@ class SapphireState:
     recent_observation: Optional[str] = None
     error: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class RealitySnapshot:
     scanned_at: str
     scan_duration_ms: float
@@ -85,12 +92,20 @@ class RealitySnapshot:
 
 # ─── Git Probing ──────────────────────────────────────────────────────────────
 
+# Environment for every scanner git spawn, built once. Read-only probes never
+# need optional locks (index refresh) or an interactive credential prompt.
+_GIT_ENV = {**os.environ, "GIT_OPTIONAL_LOCKS": "0", "GIT_TERMINAL_PROMPT": "0"}
+if GIT_ISOLATE_CONFIG:
+    _GIT_ENV.update(GIT_CONFIG_NOSYSTEM="1", GIT_CONFIG_GLOBAL=os.devnull)
+
+
 def _git(args: List[str], cwd: Path) -> Optional[str]:
     """Run a git command, return stdout or None on error."""
     try:
         result = subprocess.run(
             ["git"] + args,
             cwd=str(cwd),
+            env=_GIT_ENV,
             capture_output=True,
             text=True,
             timeout=10
@@ -101,12 +116,118 @@ def _git(args: List[str], cwd: Path) -> Optional[str]:
     except Exception:
         return None
 
+def _git_stream(args: List[str], cwd: Path, timeout: float = 10) -> Iterator[str]:
+    """
+    Run a git command and yield its stdout line by line as it arrives, so
+    large outputs are never held as one string. Raises CalledProcessError
+    after the last line if git exited non-zero (or was killed on timeout).
+    """
+    proc = subprocess.Popen(
+        ["git"] + args,
+        cwd=str(cwd),
+        env=_GIT_ENV,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    killer = threading.Timer(timeout, proc.kill)
+    killer.start()
+    try:
+        with proc.stdout:
+            for line in proc.stdout:
+                yield line.rstrip("\n")
+        returncode = proc.wait()
+    finally:
+        killer.cancel()
+        if proc.poll() is None:  # consumer stopped early
+            proc.kill()
+            proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, ["git"] + args)
+
+UNTRACKED_LIMIT = 500  # only the count and first few names are ever shown
+
+# XY status code → GitState list name, precomputed so each status line is one
+# dict lookup instead of a branch chain. Worktree changes win over staged ones.
+def _build_status_buckets(clean: str, codes: str) -> Dict[str, Optional[str]]:
+    table: Dict[str, Optional[str]] = {}
+    for x in clean + codes:
+        for y in clean + codes:
+            table[x + y] = "modified" if y != clean else ("staged" if x != clean else None)
+    return table
+
+_STATUS_BUCKET_V2 = _build_status_buckets(".", "MTADRCU")   # porcelain v2: "." = unchanged
+_STATUS_BUCKET = _build_status_buckets(" ", "MTADRCU")      # porcelain v1: " " = unchanged
+_STATUS_BUCKET["??"] = "untracked"
+
+
 def scan_repo(name: str, path: Path) -> GitState:
     state = GitState(repo_name=name, repo_path=path, available=path.exists())
     if not state.available:
         state.error = f"Path not found: {path}"
         return state
 
+    # One git call for HEAD, branch, ahead/behind and file status (git >= 2.15).
+    # --no-optional-locks: never take index.lock, so a scan can't block a commit;
+    # renames off: skips the O(n²) rename detection, we only need per-file state.
+    status_args = ["--no-optional-locks", "-c", "status.renames=false",
+                   "status", "--porcelain=v2", "--branch", "--untracked-files=normal"]
+    try:
+        ahead, behind = _parse_status_v2(state, _git_stream(status_args, path))
+    except (subprocess.CalledProcessError, OSError):
+        state.untracked, state.modified, state.staged = [], [], []
+        state.untracked_truncated = False
+        return _scan_repo_legacy(state, path)
+
+    if state.head_commit is None:
+        state.available = False
+        state.error = "Not a git repository or git not available"
+        return state
+
+    if ahead is not None:
+        state.ahead_behind = f"{ahead.lstrip('+')}\t{behind.lstrip('-')}"  # e.g. "2\t0" = 2 ahead, 0 behind
+
+    return state
+
+
+def _parse_status_v2(state: GitState, lines: Iterable[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Fill state from `git status --porcelain=v2 --branch` lines; returns (ahead, behind)."""
+    ahead = behind = None
+    buckets = {"modified": state.modified, "staged": state.staged}
+    for line in lines:
+        if line.startswith("# "):
+            key, _, value = line[2:].partition(" ")
+            if key == "branch.oid" and value != "(initial)":
+                state.head_oid = value
+                state.head_commit = value[:7]
+            elif key == "branch.head":
+                state.branch = "HEAD" if value == "(detached)" else value
+            elif key == "branch.ab":
+                ahead, behind = value.split(" ")
+        elif line.startswith("? "):
+            if len(state.untracked) < UNTRACKED_LIMIT:
+                state.untracked.append(line[2:])
+            else:
+                state.untracked_truncated = True
+        elif line[:2] in ("1 ", "2 ", "u "):
+            kind = line[0]
+            # Unmerged entries always count as modified
+            bucket = "modified" if kind == "u" else _STATUS_BUCKET_V2.get(line[2:4])
+            if bucket is None:
+                continue
+            # Path follows 8 fields for ordinary, 9 for renamed, 10 for unmerged entries
+            fname = line.split(" ", {"1": 8, "2": 9, "u": 10}[kind])[-1]
+            if kind == "2":
+                new_path, _, orig_path = fname.partition("\t")
+                fname = f"{orig_path} -> {new_path}"
+            buckets[bucket].append(fname)
+    return ahead, behind
+
+
+def _scan_repo_legacy(state: GitState, path: Path) -> GitState:
+    """Four-call scan for git older than 2.15 (no porcelain v2 / --no-optional-locks)."""
     # Check if it's a git repo
     head = _git(["rev-parse", "--short", "HEAD"], path)
     if head is None:
@@ -115,22 +236,22 @@ def scan_repo(name: str, path: Path) -> GitState:
         return state
 
     state.head_commit = head
+    state.head_oid = _git(["rev-parse", "HEAD"], path)
     state.branch = _git(["rev-parse", "--abbrev-ref", "HEAD"], path)
 
     # Status — untracked, modified, staged
-    status_raw = _git(["status", "--porcelain"], path)
-    if status_raw:
-        for line in status_raw.splitlines():
-            if len(line) < 2:
+    buckets = {"untracked": state.untracked, "modified": state.modified, "staged": state.staged}
+    try:
+        for line in _git_stream(["status", "--porcelain"], path):
+            bucket = _STATUS_BUCKET.get(line[:2])
+            if bucket is None:
                 continue
-            xy = line[:2]
-            fname = line[3:].strip()
-            if xy.startswith("??"):
-                state.untracked.append(fname)
-            elif xy[1] != " ":
-                state.modified.append(fname)
-            elif xy[0] != " ":
-                state.staged.append(fname)
+            if bucket == "untracked" and len(state.untracked) >= UNTRACKED_LIMIT:
+                state.untracked_truncated = True
+                continue
+            buckets[bucket].append(line[3:].strip())
+    except (subprocess.CalledProcessError, OSError):
+        pass
 
     # Ahead/behind origin
     ab = _git(["rev-list", "--left-right", "--count", f"{state.branch}...origin/{state.branch}"], path)
@@ -141,20 +262,55 @@ def scan_repo(name: str, path: Path) -> GitState:
 
 
 # ─── HTTP Probing ─────────────────────────────────────────────────────────────
+# One client shared by every probe and every scan, so keepalive (and HTTP/2
+# when h2 is installed) reuses connections to the known service hosts.
+_HTTP_CLIENT: Optional["httpx.AsyncClient"] = None
+_HTTP_CLIENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_client() -> "httpx.AsyncClient":
+    """Return the shared probe client, rebuilding it if the event loop changed
+    (full_scan_sync runs each scan under a fresh asyncio.run loop)."""
+    global _HTTP_CLIENT, _HTTP_CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if _HTTP_CLIENT is None or _HTTP_CLIENT_LOOP is not loop or _HTTP_CLIENT.is_closed:
+        try:
+            import h2  # noqa: F401  (httpx[http2])
+            http2 = True
+        except ImportError:
+            http2 = False
+        _HTTP_CLIENT = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True,
+            http2=http2,
+            limits=httpx.Limits(max_keepalive_connections=32),
+        )
+        _HTTP_CLIENT_LOOP = loop
+    return _HTTP_CLIENT
+
+
+async def close_http_client() -> None:
+    """Close the shared probe client (FastAPI shutdown / end of a sync scan)."""
+    global _HTTP_CLIENT, _HTTP_CLIENT_LOOP
+    client, _HTTP_CLIENT, _HTTP_CLIENT_LOOP = _HTTP_CLIENT, None, None
+    if client is not None:
+        await client.aclose()
+
 
 async def probe_service_async(name: str, url: str) -> ServiceState:
     state = ServiceState(name=name, url=url, reachable=False)
     health_url = url.rstrip("/") + "/health"
-    start = asyncio.get_event_loop().time()
+    start = time.perf_counter()
 
     if HTTPX_AVAILABLE:
         try:
-            async with httpx.AsyncClient(timeout=HTTP_TIMEOUT, follow_redirects=True) as client:
-                resp = await client.get(health_url)
-                elapsed = (asyncio.get_event_loop().time() - start) * 1000
-                state.reachable = True
-                state.status_code = resp.status_code
-                state.response_ms = round(elapsed, 1)
+            resp = await _get_client().get(health_url)
+            elapsed = (time.perf_counter() - start) * 1000
+            state.reachable = True
+            state.status_code = resp.status_code
+            state.response_ms = round(elapsed, 1)
+            # Only decode bodies that are actually JSON (skips HTML error pages)
+            if resp.content and resp.headers.get("content-type", "").startswith("application/json"):
                 try:
                     body = resp.json()
                     state.health_detail = body
@@ -166,13 +322,11 @@ async def probe_service_async(name: str, url: str) -> ServiceState:
     else:
         # Fallback: urllib (sync, run in executor)
         import urllib.request as urlreq
-        import time
         try:
-            t0 = time.time()
             with urlreq.urlopen(health_url, timeout=HTTP_TIMEOUT) as r:
                 state.reachable = True
                 state.status_code = r.status
-                state.response_ms = round((time.time() - t0) * 1000, 1)
+                state.response_ms = round((time.perf_counter() - start) * 1000, 1)
         except Exception as e:
             state.error = str(e)[:120]
 
@@ -192,41 +346,82 @@ async def scan_services_async(services: Dict[str, str]) -> Dict[str, ServiceStat
 
 # ─── Database Probing ─────────────────────────────────────────────────────────
 
+# Fixed SQL text: sqlite3's per-connection statement cache is keyed by the
+# exact string, so on the pooled connection each is prepared only once.
+_SQL_LIB_STATS = """
+    SELECT COUNT(*),
+           COALESCE(SUM(priority = 'current focus'), 0),
+           COALESCE(SUM(priority = 'essence'), 0),
+           COALESCE(SUM(embedding IS NOT NULL), 0)
+    FROM architect_guidance
+"""
+_SQL_LIB_HANDOFF = """
+    SELECT substr(content, 1, 200) FROM architect_guidance
+    WHERE content LIKE '%PHOENIX%HANDOFF%' OR content LIKE '%HANDOFF%Instance%'
+    ORDER BY created_at DESC LIMIT 1
+"""
+# Fast path when the DB carries an FTS5 index over guidance content, kept in
+# sync with the table by the standard external-content triggers:
+#   CREATE VIRTUAL TABLE architect_guidance_fts USING fts5(
+#       content, content='architect_guidance', content_rowid='id');
+#   CREATE TRIGGER architect_guidance_fts_ai AFTER INSERT ON architect_guidance BEGIN
+#       INSERT INTO architect_guidance_fts(rowid, content) VALUES (new.id, new.content);
+#   END;
+#   CREATE TRIGGER architect_guidance_fts_ad AFTER DELETE ON architect_guidance BEGIN
+#       INSERT INTO architect_guidance_fts(architect_guidance_fts, rowid, content)
+#       VALUES ('delete', old.id, old.content);
+#   END;
+#   CREATE TRIGGER architect_guidance_fts_au AFTER UPDATE ON architect_guidance BEGIN
+#       INSERT INTO architect_guidance_fts(architect_guidance_fts, rowid, content)
+#       VALUES ('delete', old.id, old.content);
+#       INSERT INTO architect_guidance_fts(rowid, content) VALUES (new.id, new.content);
+#   END;
+#   INSERT INTO architect_guidance_fts(architect_guidance_fts) VALUES('rebuild');
+# Token match instead of the LIKE full-table scan. Used only when all three
+# triggers exist — an index built without them misses every later handoff —
+# otherwise (or when the table is absent) the LIKE query runs.
+_SQL_LIB_FTS_TRIGGERS = """
+    SELECT COUNT(*) FROM sqlite_master
+    WHERE type = 'trigger' AND tbl_name = 'architect_guidance'
+      AND sql LIKE '%architect_guidance_fts%'
+"""
+_SQL_LIB_HANDOFF_FTS = """
+    SELECT substr(g.content, 1, 200)
+    FROM architect_guidance_fts JOIN architect_guidance g ON g.id = architect_guidance_fts.rowid
+    WHERE architect_guidance_fts MATCH '(PHOENIX AND HANDOFF) OR (HANDOFF AND Instance)'
+    ORDER BY g.created_at DESC LIMIT 1
+"""
+_SQL_SAP_ROUTING_COUNT = "SELECT COUNT(*) FROM routing_observations"
+_SQL_SAP_ROUTING_LATEST = "SELECT query_text, observed_at FROM routing_observations ORDER BY observed_at DESC LIMIT 1"
+_SQL_SAP_PATTERN_COUNT = "SELECT COUNT(*) FROM detected_patterns"
+_SQL_SAP_UNAPPLIED_COUNT = "SELECT COUNT(*) FROM detected_patterns WHERE adjustment_applied=0"
+
+
 def scan_librarian(db_path: Path) -> LibrarianState:
     state = LibrarianState(db_path=db_path, readable=db_path.exists())
     if not state.readable:
         state.error = f"DB not found: {db_path}"
         return state
     try:
-        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute("SELECT COUNT(*) FROM architect_guidance")
-        state.total_guidance = c.fetchone()[0]
-
-        c.execute("SELECT COUNT(*) FROM architect_guidance WHERE priority='current focus'")
-        state.current_focus_count = c.fetchone()[0]
-
-        c.execute("SELECT COUNT(*) FROM architect_guidance WHERE priority='essence'")
-        state.essence_count = c.fetchone()[0]
-
-        c.execute("SELECT COUNT(*) FROM architect_guidance WHERE embedding IS NOT NULL")
-        embedded = c.fetchone()[0]
-        if state.total_guidance > 0:
-            state.embedding_coverage_pct = round(embedded / state.total_guidance * 100, 1)
-
-        # Most recent handoff
-        c.execute("""
-            SELECT substr(content, 1, 200) FROM architect_guidance
-            WHERE content LIKE '%PHOENIX%HANDOFF%' OR content LIKE '%HANDOFF%Instance%'
-            ORDER BY created_at DESC LIMIT 1
-        """)
-        row = c.fetchone()
-        if row:
-            state.recent_handoff = row[0]
-
-        conn.close()
+        with ro_conn(db_path) as conn, closing(conn.cursor()) as c:
+            # All four counts in one pass over the table
+            c.execute(_SQL_LIB_STATS)
+            state.total_guidance, state.current_focus_count, state.essence_count, embedded = c.fetchone()
+            if state.total_guidance > 0:
+                state.embedding_coverage_pct = round(embedded / state.total_guidance * 100, 1)
+
+            # Most recent handoff
+            c.execute(_SQL_LIB_FTS_TRIGGERS)
+            if c.fetchone()[0] >= 3:
+                try:
+                    c.execute(_SQL_LIB_HANDOFF_FTS)
+                except sqlite3.OperationalError:  # triggers present but no FTS table
+                    c.execute(_SQL_LIB_HANDOFF)
+            else:
+                c.execute(_SQL_LIB_HANDOFF)
+            row = c.fetchone()
+            if row:
+                state.recent_handoff = row[0]
     except Exception as e:
         state.error = str(e)
     return state
@@ -238,30 +433,27 @@ def scan_sapphire(db_path: Path) -> SapphireState:
         state.error = f"DB not found: {db_path}"
         return state
     try:
-        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        try:
-            c.execute("SELECT COUNT(*) FROM routing_observations")
-            state.routing_observations = c.fetchone()[0]
-
-            c.execute("SELECT query_text, observed_at FROM routing_observations ORDER BY observed_at DESC LIMIT 1")
-            row = c.fetchone()
-            if row:
-                state.recent_observation = f"{row['observed_at']}: {row['query_text'][:80]}"
-        except Exception:
-            pass
-
-        try:
-            c.execute("SELECT COUNT(*) FROM detected_patterns")
-            state.detected_patterns = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM detected_patterns WHERE adjustment_applied=0")
-            state.unapplied_patterns = c.fetchone()[0]
-        except Exception:
-            pass
-
-        conn.close()
+        with ro_conn(db_path) as conn, closing(conn.cursor()) as c:
+            c.row_factory = sqlite3.Row
+
+            try:
+                c.execute(_SQL_SAP_ROUTING_COUNT)
+                state.routing_observations = c.fetchone()[0]
+
+                c.execute(_SQL_SAP_ROUTING_LATEST)
+                row = c.fetchone()
+                if row:
+                    state.recent_observation = f"{row['observed_at']}: {row['query_text'][:80]}"
+            except Exception:
+                pass
+
+            try:
+                c.execute(_SQL_SAP_PATTERN_COUNT)
+                state.detected_patterns = c.fetchone()[0]
+                c.execute(_SQL_SAP_UNAPPLIED_COUNT)
+                state.unapplied_patterns = c.fetchone()[0]
+            except Exception:
+                pass
     except Exception as e:
         state.error = str(e)
     return state
@@ -269,10 +461,14 @@ def scan_sapphire(db_path: Path) -> SapphireState:
 
 # ─── Filesystem Checks ────────────────────────────────────────────────────────
 
+# Keys the engine's work order looks up by name
+KEY_PNS = "coach/APPENDIX_PERSISTENCE_NERVOUS_SYSTEM.md"
+KEY_FORGE = "omni/path_tau/README.md"
+
 KEY_FILES = {
-    "coach/APPENDIX_PERSISTENCE_NERVOUS_SYSTEM.md": REPOS["coach"] / "APPENDIX_PERSISTENCE_NERVOUS_SYSTEM.md",
+    KEY_PNS:                                          REPOS["coach"] / "APPENDIX_PERSISTENCE_NERVOUS_SYSTEM.md",
     "coach/APPENDIX_PHASE_TRACKER.md":               REPOS["coach"] / "APPENDIX_PHASE_TRACKER.md",
-    "omni/path_tau/README.md":                        REPOS["omni"] / "path_tau" / "README.md",
+    KEY_FORGE:                                        REPOS["omni"] / "path_tau" / "README.md",
     "omni/path_tau/orchestrator/__init__.py":          REPOS["omni"] / "path_tau" / "orchestrator" / "orchestrator" / "__init__.py",
     "bridge/tau_integration.py":                      REPOS["bridge"] / "tau_integration.py",
     "bridge/cloud_eye_mcp_bridge.py":                 REPOS["bridge"] / "cloud_eye_mcp_bridge.py",
@@ -280,28 +476,50 @@ KEY_FILES = {
     "sapphire_db":                                    SAPPHIRE_DB,
 }
 
+# Files rarely disappear, so a positive result is trusted for a while; missing
+# files (the actionable case) are re-checked on every scan.
+FS_EXISTS_TTL_SECONDS = 30.0
+_FS_CACHE: Dict[str, float] = {}  # key → monotonic time it was last seen existing
+
+
 def scan_filesystem() -> Dict[str, bool]:
-    return {name: path.exists() for name, path in KEY_FILES.items()}
+    now = time.monotonic()
+    result = {}
+    for name, path in KEY_FILES.items():
+        seen_at = _FS_CACHE.get(name)
+        if seen_at is not None and now - seen_at < FS_EXISTS_TTL_SECONDS:
+            result[name] = True
+            continue
+        exists = path.exists()
+        if exists:
+            _FS_CACHE[name] = now
+        else:
+            _FS_CACHE.pop(name, None)
+        result[name] = exists
+    return result
 
 
 # ─── Main Entry Point ─────────────────────────────────────────────────────────
 
 async def full_scan() -> RealitySnapshot:
-    t0 = datetime.now(timezone.utc)
-
-    # Run git and filesystem synchronously (fast, local)
-    git_states = {name: scan_repo(name, path) for name, path in REPOS.items()}
-    fs_state = scan_filesystem()
-    lib_state = scan_librarian(LIBRARIAN_DB)
-    sap_state = scan_sapphire(SAPPHIRE_DB)
-
-    # Run HTTP probes concurrently
-    svc_states = await scan_services_async(SERVICES)
+    scanned_at = datetime.now(timezone.utc)
+    t0 = time.perf_counter()  # monotonic; wall clock is only for the timestamp
+
+    # Overlap every IO domain: git subprocesses, DB reads and filesystem
+    # checks in worker threads, HTTP probes on the event loop
+    git_results, fs_state, lib_state, sap_state, svc_states = await asyncio.gather(
+        asyncio.gather(*[asyncio.to_thread(scan_repo, name, path) for name, path in REPOS.items()]),
+        asyncio.to_thread(scan_filesystem),
+        asyncio.to_thread(scan_librarian, LIBRARIAN_DB),
+        asyncio.to_thread(scan_sapphire, SAPPHIRE_DB),
+        scan_services_async(SERVICES),
+    )
+    git_states = dict(zip(REPOS, git_results))
 
-    elapsed = (datetime.now(timezone.utc) - t0).total_seconds() * 1000
+    elapsed = (time.perf_counter() - t0) * 1000
 
     return RealitySnapshot(
-        scanned_at=t0.isoformat(),
+        scanned_at=scanned_at.isoformat(),
         scan_duration_ms=round(elapsed, 1),
         git=git_states,
         services=svc_states,
@@ -313,4 +531,10 @@ async def full_scan() -> RealitySnapshot:
 
 def full_scan_sync() -> RealitySnapshot:
     """Synchronous wrapper for contexts without running event loop."""
-    return asyncio.run(full_scan())
+    async def _scan_and_close() -> RealitySnapshot:
+        try:
+            return await full_scan()
+        finally:
+            if HTTPX_AVAILABLE:
+                await close_http_client()
+    return asyncio.run(_scan_and_close())
@@ -3,47 +3,143 @@ PowerShell Bridge — Execution engine.
 Runs run.bat, parses report.json, returns structured results.
 Windows-first design: .bat -> run.ps1 filter layer.
 """
+import asyncio
 import json
 import os
-import subprocess
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Tuple
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from .hosted_runspace import HostedRunspace
+
+_UTF8_BOM = b"\xef\xbb\xbf"  # Windows PowerShell's `-Encoding utf8` writes one
 
 
 def tail_text(path: Path, max_chars: int = 12000) -> str:
-    if not path.exists():
+    """Last max_chars of a log — reads only the tail window, not the whole file."""
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
         return ""
-    txt = path.read_text(encoding="utf-8", errors="replace")
-    return txt[-max_chars:]
+    n = min(size, max_chars * 4)  # UTF-8 is at most 4 bytes per char
+    with path.open("rb") as f:
+        f.seek(size - n)
+        data = f.read(n)
+    if n < size:
+        # Window may open mid-character: skip continuation bytes (10xxxxxx)
+        start = 0
+        while start < min(3, len(data)) and data[start] & 0xC0 == 0x80:
+            start += 1
+        data = data[start:]
+    return data.decode("utf-8", errors="replace")[-max_chars:]
+
+
+def iter_log(path: Path, chunk_size: int = 65536) -> Iterator[bytes]:
+    """Yield a log file's raw bytes chunk by chunk (for streaming responses)."""
+    with path.open("rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+# report.json → parsed dict, keyed by path and reused while (mtime, size) match.
+# LRU-bounded: /sessions reads every run's report, so an unbounded dict would
+# hold every session ever listed. Sync routes share it across threadpool workers.
+REPORT_CACHE_SIZE = 64
+_REPORT_CACHE: "OrderedDict[str, Tuple[int, int, dict]]" = OrderedDict()
+_REPORT_LOCK = threading.Lock()
+
+
+def read_report(report_path: Path) -> dict:
+    """Parse a session's report.json, skipping the read if it hasn't changed."""
+    st = report_path.stat()
+    key = str(report_path)
+    with _REPORT_LOCK:
+        cached = _REPORT_CACHE.get(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _REPORT_CACHE.move_to_end(key)
+            return cached[2]
+    report = _load_json(report_path.read_bytes())
+    with _REPORT_LOCK:
+        _REPORT_CACHE[key] = (st.st_mtime_ns, st.st_size, report)
+        _REPORT_CACHE.move_to_end(key)
+        while len(_REPORT_CACHE) > REPORT_CACHE_SIZE:
+            _REPORT_CACHE.popitem(last=False)
+    return report
+
+
+def read_commands(commands_path: Path) -> dict:
+    """Parse a session's commands.json (uncached — only replay reads it)."""
+    return _load_json(commands_path.read_bytes())
 
 
-def run_session(run_dir: Path, timeout_s: int) -> Tuple[int, dict, str]:
+def _load_json(raw: bytes) -> dict:
+    if raw.startswith(_UTF8_BOM):
+        raw = raw[len(_UTF8_BOM):]
+    return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw.decode("utf-8"))
+
+
+async def run_session(run_dir: Path, timeout_s: int,
+                      argv: Optional[List[str]] = None) -> Tuple[int, dict, str]:
     """
-    Execute run.bat inside run_dir.
+    Execute a session inside run_dir without blocking the event loop.
+    By default runs run.bat (Windows-only: requires cmd.exe); pass argv
+    (see session_builder.ps1_argv) to start PowerShell directly instead.
     Returns (returncode, report_dict, log_tail).
-    Windows-only: requires cmd.exe.
     """
     bat = run_dir / "run.bat"
     report_path = run_dir / "report.json"
     log_path = run_dir / "run.log"
 
-    if os.name != "nt":
+    if argv is None and os.name != "nt":
         return 501, {"error": "PowerShell .bat bridge requires Windows cmd.exe/powershell.exe."}, ""
+    if argv is None:
+        argv = ["cmd.exe", "/c", str(bat)]
 
     try:
-        completed = subprocess.run(
-            ["cmd.exe", "/c", str(bat)],
+        # run.ps1 writes everything to run.log — don't buffer it here too
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
             cwd=str(run_dir),
-            capture_output=True,
-            text=True,
-            timeout=timeout_s
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
         )
-        report = {}
-        if report_path.exists():
-            raw = report_path.read_text(encoding="utf-8-sig")  # utf-8-sig strips BOM
-            report = json.loads(raw)
-        return completed.returncode, report, tail_text(log_path)
-    except subprocess.TimeoutExpired:
+        try:
+            returncode = await asyncio.wait_for(proc.wait(), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return -1, {"error": "Execution timeout"}, tail_text(log_path)
+        report = read_report(report_path) if report_path.exists() else {}
+        return returncode, report, tail_text(log_path)
+    except Exception as e:
+        return -2, {"error": str(e)}, tail_text(log_path)
+
+
+async def run_hosted_session(host: "HostedRunspace", run_dir: Path, session_id: str,
+                             error_strategy: str, timeout_s: int,
+                             ps1: Optional[Path] = None) -> Tuple[int, dict, str]:
+    """
+    Like run_session, but runs run.ps1 inside a resident PowerShell process
+    (see hosted_runspace.py) instead of spawning one per session.
+    """
+    report_path = run_dir / "report.json"
+    log_path = run_dir / "run.log"
+    try:
+        returncode = await host.run(run_dir, session_id, error_strategy, timeout_s, ps1=ps1)
+    except asyncio.TimeoutError:
         return -1, {"error": "Execution timeout"}, tail_text(log_path)
     except Exception as e:
         return -2, {"error": str(e)}, tail_text(log_path)
+    report = read_report(report_path) if report_path.exists() else {}
+    return returncode, report, tail_text(log_path)
@@ -0,0 +1,138 @@
+"""
+PowerShell Bridge — Hosted runspace.
+Keeps one PowerShell process alive across sessions so only the first run pays
+interpreter startup / module autoload. A resident dispatcher reads one JSON
+request per stdin line, runs that session's run.ps1 in-process, and answers
+with one {"rc": N} line on stdout. run.ps1, commands.json, report.json and
+run.log are unchanged — only the launcher differs.
+"""
+import asyncio
+import base64
+import json
+from pathlib import Path
+from typing import Optional
+
+# Runs each session in a child scope (& run.ps1), restores the location it
+# changed, and keeps the session's own output off the protocol stream.
+# It stays a script file rather than a [scriptblock]: `exit` in a script
+# ends the script, in a scriptblock it would end this host.
+_DISPATCHER = r"""
+$ProgressPreference = 'SilentlyContinue'
+$out = [Console]::Out
+$scripts = @{}  # shared run.ps1 path -> resolved script, looked up once
+while ($null -ne ($line = [Console]::In.ReadLine())) {
+    $rc = 1
+    try {
+        $req = $line | ConvertFrom-Json
+        $global:LASTEXITCODE = 0
+        Push-Location -LiteralPath $req.run_dir
+        try {
+            $target = $req.ps1
+            if ($req.cache) {
+                $target = $scripts[$req.ps1]
+                if (-not $target) {
+                    $target = $ExecutionContext.InvokeCommand.GetCommand($req.ps1, 'ExternalScript')
+                    $scripts[$req.ps1] = $target
+                }
+            }
+            & $target -RunDir $req.run_dir -SessionId $req.session_id -ErrorStrategy $req.error_strategy *> $null
+            $rc = $LASTEXITCODE
+        } finally {
+            Pop-Location
+        }
+    } catch {
+        $rc = 1
+    }
+    $out.WriteLine('{"rc":' + [int]$rc + '}')
+    $out.Flush()
+}
+"""
+# -EncodedCommand (UTF-16LE base64) sidesteps every cmd-line quoting rule
+_DISPATCHER_B64 = base64.b64encode(_DISPATCHER.encode("utf-16-le")).decode("ascii")
+
+
+class HostedRunspace:
+    """One resident PowerShell process; sessions run through it one at a time."""
+
+    def __init__(self, powershell_exe: str):
+        self.powershell_exe = powershell_exe
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _ensure(self) -> asyncio.subprocess.Process:
+        # Pipes belong to the loop that created them; start over if the
+        # process died or we're on a different loop now.
+        loop = asyncio.get_running_loop()
+        if self._proc is None or self._proc.returncode is not None or self._loop is not loop:
+            self._proc = await asyncio.create_subprocess_exec(
+                self.powershell_exe, "-NoLogo", "-NoProfile", "-NonInteractive",
+                "-ExecutionPolicy", "Bypass", "-EncodedCommand", _DISPATCHER_B64,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            self._loop = loop
+        return self._proc
+
+    async def run(self, run_dir: Path, session_id: str, error_strategy: str, timeout_s: int,
+                  ps1: Optional[Path] = None) -> int:
+        """
+        Run a session in the resident process and return its exit code.
+        ps1 is a shared script (session_builder.cached_run_ps1) the
+        dispatcher resolves once and reuses; default is run_dir/run.ps1.
+        On timeout the process is killed (the next call respawns it) and
+        asyncio.TimeoutError is raised.
+        """
+        # Keyed on the loop that owns the lock, recorded when it is made —
+        # not on _loop, which is only set once the first spawn has finished.
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        async with self._lock:
+            proc = await self._ensure()
+            request = json.dumps({
+                "ps1": str(ps1 or run_dir / "run.ps1"),
+                "cache": ps1 is not None,
+                "run_dir": str(run_dir),
+                "session_id": session_id,
+                "error_strategy": error_strategy,
+            })
+            try:
+                proc.stdin.write(request.encode("utf-8") + b"\n")
+                await proc.stdin.drain()
+                return await asyncio.wait_for(self._read_rc(proc), timeout=timeout_s)
+            except BaseException:
+                await self._kill()
+                raise
+
+    @staticmethod
+    async def _read_rc(proc: asyncio.subprocess.Process) -> int:
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                raise RuntimeError("Hosted PowerShell exited")
+            line = line.strip()
+            if line.startswith(b'{"rc":'):  # ignore anything else a profile/host printed
+                return int(json.loads(line)["rc"])
+
+    async def _kill(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+    async def close(self) -> None:
+        """Stop the resident process (EOF on stdin ends the dispatcher loop)."""
+        proc = self._proc
+        if proc is None or proc.returncode is not None:
+            self._proc = None
+            return
+        try:
+            proc.stdin.close()
+            await asyncio.wait_for(proc.wait(), timeout=5)
+            self._proc = None
+        except Exception:
+            await self._kill()
@@ -15,7 +15,7 @@ class PowerShellCommand(BaseModel):
 class ExecuteRequest(BaseModel):
     commands: List[PowerShellCommand]
     session_id: Optional[str] = None
-    error_strategy: str = "continue"  # continue | halt | retry
+    error_strategy: str = "continue"  # continue | halt | retry | parallel (pwsh 7+, independent commands)
 
 
 class ExecuteResult(BaseModel):
@@ -8,28 +8,47 @@ Endpoints:
     GET  /powershell/health
     POST /powershell/execute
     GET  /powershell/runs/{session_id}
+    GET  /powershell/runs/{session_id}/log
+    GET  /powershell/runs/{session_id}/output/{idx}
     GET  /powershell/sessions
     POST /powershell/replay/{session_id}
 """
-import json
 import os
 from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+    from fastapi.responses import ORJSONResponse as JSONResponse
+except ImportError:
+    pass
 
 from .models import ExecuteRequest, ExecuteResult
 from .session_builder import (
-    new_session_id, ensure_run_dir,
-    write_commands_json, write_ps1, write_bat
+    new_session_id, ensure_run_dir, write_session, ps1_argv, cached_run_ps1
 )
-from .executor import run_session, tail_text
+from .executor import run_session, run_hosted_session, read_report, read_commands, tail_text, iter_log
+from .hosted_runspace import HostedRunspace
 
-router = APIRouter()
+router = APIRouter(default_response_class=JSONResponse)
 
 API_TOKEN = os.environ.get("CLOUD_EYE_API_TOKEN", "wuji-neigong-2026")
 RUNS_DIR = Path(os.environ.get("POWERSHELL_BRIDGE_RUNS_DIR", "ps_runs")).resolve()
 POWERSHELL_EXE = os.environ.get("POWERSHELL_EXE", "powershell.exe")
+# 0 → launch run.ps1 directly with `-File` (no run.bat, no cmd.exe hop)
+USE_BAT = os.environ.get("POWERSHELL_BRIDGE_USE_BAT", "1") != "0"
+# 1 → run sessions inside one resident PowerShell process (no spawn per run)
+HOSTED = os.environ.get("POWERSHELL_BRIDGE_HOSTED", "0") == "1"
+_HOST: Optional[HostedRunspace] = HostedRunspace(POWERSHELL_EXE) if HOSTED else None
+
+
+@router.on_event("shutdown")
+async def _close_hosted_runspace():
+    if _HOST is not None:
+        await _HOST.close()
 
 
 def _auth(authorization: Optional[str]):
@@ -44,12 +63,14 @@ def ps_health():
         "element": "fire",
         "runs_dir": str(RUNS_DIR),
         "powershell_exe": POWERSHELL_EXE,
+        "use_bat": USE_BAT,
+        "hosted": HOSTED,
         "platform": os.name
     }
 
 
 @router.post("/execute", response_model=ExecuteResult)
-def ps_execute(req: ExecuteRequest, authorization: Optional[str] = Header(None)):
+async def ps_execute(req: ExecuteRequest, authorization: Optional[str] = Header(None)):
     """
     Execute PowerShell commands through the defensive .bat filter layer.
     Every command becomes a replayable session with structured JSON logs.
@@ -62,19 +83,27 @@ def ps_execute(req: ExecuteRequest, authorization: Optional[str] = Header(None))
 
     payload = {
         "session_id": session_id,
+        "error_strategy": req.error_strategy,
         "commands": [c.model_dump() for c in req.commands]
     }
-    write_commands_json(run_dir, payload)
-    write_ps1(run_dir)
-    write_bat(
+    write_session(
         run_dir,
+        payload,
         session_id=session_id,
         error_strategy=req.error_strategy,
-        powershell_exe=POWERSHELL_EXE
+        powershell_exe=POWERSHELL_EXE,
+        with_bat=USE_BAT,
+        embed_payload=_HOST is None  # the hosted script is shared, so it reads commands.json
     )
-
     timeout_s = max(c.timeout_s for c in req.commands) + 60
-    rc, report, log_tail = run_session(run_dir, timeout_s=timeout_s)
+    if _HOST is not None:
+        rc, report, log_tail = await run_hosted_session(
+            _HOST, run_dir, session_id, req.error_strategy, timeout_s=timeout_s,
+            ps1=cached_run_ps1(RUNS_DIR)
+        )
+    else:
+        argv = None if USE_BAT else ps1_argv(run_dir, session_id, req.error_strategy, POWERSHELL_EXE)
+        rc, report, log_tail = await run_session(run_dir, timeout_s=timeout_s, argv=argv)
     ok = rc == 0 and report.get("status") == "success"
 
     return ExecuteResult(
@@ -89,20 +118,55 @@ def ps_execute(req: ExecuteRequest, authorization: Optional[str] = Header(None))
 
 @router.get("/runs/{session_id}")
 def get_run(session_id: str, authorization: Optional[str] = Header(None)):
-    """Retrieve structured report + log for a completed session."""
+    """
+    Retrieve structured report + log for a session. report.json is streamed
+    while run.ps1 runs (and left unterminated if it was killed), so a report
+    that doesn't parse yet comes back as status "incomplete" with the log.
+    """
     _auth(authorization)
     run_dir = (RUNS_DIR / session_id).resolve()
     report_path = run_dir / "report.json"
     log_path = run_dir / "run.log"
     if not report_path.exists():
         raise HTTPException(status_code=404, detail="Run not found")
+    log = log_path.read_text(encoding="utf-8", errors="replace") if log_path.exists() else ""
+    try:
+        report = read_report(report_path)
+    except ValueError:  # json / orjson decode errors
+        return {
+            "session_id": session_id,
+            "status": "incomplete",
+            "detail": "report.json is still being written, or the run was killed before it finished",
+            "report": None,
+            "log": log
+        }
     return {
         "session_id": session_id,
-        "report": json.loads(report_path.read_text(encoding="utf-8-sig")),
-        "log": log_path.read_text(encoding="utf-8", errors="replace") if log_path.exists() else ""
+        "report": report,
+        "log": log
     }
 
 
+@router.get("/runs/{session_id}/log")
+def get_run_log(session_id: str, authorization: Optional[str] = Header(None)):
+    """Stream a session's full run.log as raw bytes (no JSON wrapping or decode)."""
+    _auth(authorization)
+    log_path = (RUNS_DIR / session_id).resolve() / "run.log"
+    if not log_path.exists():
+        raise HTTPException(status_code=404, detail="Log not found")
+    return StreamingResponse(iter_log(log_path), media_type="text/plain; charset=utf-8")
+
+
+@router.get("/runs/{session_id}/output/{idx}")
+def get_run_output(session_id: str, idx: int, authorization: Optional[str] = Header(None)):
+    """Stream one command's captured output (report.json holds only its output_path)."""
+    _auth(authorization)
+    out_path = (RUNS_DIR / session_id).resolve() / "out" / f"{idx}.txt"
+    if not out_path.exists():
+        raise HTTPException(status_code=404, detail="Output not found")
+    return StreamingResponse(iter_log(out_path), media_type="text/plain; charset=utf-8")
+
+
 @router.get("/sessions")
 def list_sessions(authorization: Optional[str] = Header(None)):
     """List all recorded PowerShell sessions."""
@@ -111,28 +175,45 @@ def list_sessions(authorization: Optional[str] = Header(None)):
     sessions = []
     for report_file in RUNS_DIR.glob("*/report.json"):
         try:
-            data = json.loads(report_file.read_text(encoding="utf-8-sig"))
+            data = read_report(report_file)
+        except ValueError:  # running, or killed mid-write: report not closed yet
             sessions.append({
                 "session_id": report_file.parent.name,
-                "status": data.get("status", "unknown"),
-                "started_at": data.get("started_at"),
-                "failed": data.get("failed", 0)
+                "status": "incomplete",
+                "started_at": None,
+                "failed": None
             })
+            continue
         except Exception:
             continue
+        sessions.append({
+            "session_id": report_file.parent.name,
+            "status": data.get("status", "unknown"),
+            "started_at": data.get("started_at"),
+            "failed": data.get("failed", 0)
+        })
     sessions.sort(key=lambda x: x.get("started_at") or "", reverse=True)
     return {"count": len(sessions), "sessions": sessions}
 
 
 @router.post("/replay/{session_id}")
-def replay_session(session_id: str, authorization: Optional[str] = Header(None)):
-    """Re-execute a previous session's .bat file for debugging / self-healing."""
+async def replay_session(session_id: str, authorization: Optional[str] = Header(None)):
+    """Re-execute a previous session (its .bat, or run.ps1 directly) for debugging / self-healing."""
     _auth(authorization)
     run_dir = (RUNS_DIR / session_id).resolve()
-    bat = run_dir / "run.bat"
-    if not bat.exists():
-        raise HTTPException(status_code=404, detail="Session .bat not found")
-    rc, report, log_tail = run_session(run_dir, timeout_s=300)
+    argv = None
+    if not (run_dir / "run.bat").exists():
+        if not (run_dir / "run.ps1").exists():
+            raise HTTPException(status_code=404, detail="Session not found")
+        # Self-contained run.ps1 falls back to its embedded error_strategy
+        strategy = None
+        if (run_dir / "commands.json").exists():
+            try:
+                strategy = read_commands(run_dir / "commands.json").get("error_strategy")
+            except Exception:
+                pass
+        argv = ps1_argv(run_dir, session_id, strategy, POWERSHELL_EXE)
+    rc, report, log_tail = await run_session(run_dir, timeout_s=300, argv=argv)
     return {
         "replayed": True,
         "session_id": session_id,
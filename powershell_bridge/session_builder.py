@@ -1,118 +1,366 @@
 """
 PowerShell Bridge — Session builder.
-Writes commands.json, run.ps1, and the defensive run.bat shim.
+Writes run.ps1 (payload embedded, or read from commands.json) and the
+defensive run.bat shim.
 """
+import functools
+import hashlib
 import json
-import uuid
+import os
+import secrets
+import string
 from pathlib import Path
 from datetime import datetime
+from typing import List, Optional, Tuple
 
-
-def new_session_id() -> str:
-    return uuid.uuid4().hex[:10]
-
-
-def ensure_run_dir(runs_dir: Path, session_id: str) -> Path:
-    d = (runs_dir / session_id).resolve()
-    d.mkdir(parents=True, exist_ok=True)
-    return d
-
-
-def write_commands_json(run_dir: Path, payload: dict) -> Path:
-    p = run_dir / "commands.json"
-    p.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    return p
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 
-def write_ps1(run_dir: Path) -> Path:
-    """Write run.ps1 — reads commands.json, executes sequentially, writes report.json + run.log."""
-    ps1 = run_dir / "run.ps1"
-    ps1.write_text(r"""
+# ─── Templates ────────────────────────────────────────────────────────────────
+# Encoded once at import; every session writes the same bytes. Line endings
+# follow the platform, as write_text() produced them.
+_RUN_PS1_TEMPLATE = r"""
+#Requires -Version 5.0
 param(
     [Parameter(Mandatory=$true)][string]$RunDir,
     [Parameter(Mandatory=$true)][string]$SessionId,
-    [Parameter(Mandatory=$true)][string]$ErrorStrategy
+    [string]$ErrorStrategy  # omitted -> the payload's error_strategy (replay)
 )
 $ErrorActionPreference = 'Stop'
-$globalStart = Get-Date
-$commandsPath = Join-Path $RunDir 'commands.json'
-$reportPath   = Join-Path $RunDir 'report.json'
-$logPath      = Join-Path $RunDir 'run.log'
+$ProgressPreference = 'SilentlyContinue'  # nobody sees the bar; rendering it slows web/archive cmdlets
+Set-StrictMode -Off                       # working_dir lookup relies on absent properties reading as $null
+# Everything the runner needs after a command has run lives in $__ce, not in
+# plain variables: commands are dot-sourced into this scope, and an ordinary
+# `$log = ...` or `$failed = ...` there must not clobber the writers/counters.
+# UTC timestamps are formatted with the invariant culture: no cmdlet call, no
+# time-zone conversion, no culture lookup per stamp.
+$__ce = @{
+    inv    = [System.Globalization.CultureInfo]::InvariantCulture
+    tsFmt  = 'yyyy-MM-ddTHH:mm:ss.fffffffZ'
+    logFmt = 'yyyy-MM-ddTHH:mm:ssZ'
+}
+$globalStart = [DateTime]::UtcNow.ToString($__ce.tsFmt, $__ce.inv)
+# File I/O goes straight to System.IO (RunDir is always absolute), not
+# through the provider cmdlets
+$commandsPath = [System.IO.Path]::Combine($RunDir, 'commands.json')
+$reportPath   = [System.IO.Path]::Combine($RunDir, 'report.json')
+$logPath      = [System.IO.Path]::Combine($RunDir, 'run.log')
+$__ce.outDir  = [System.IO.Path]::Combine($RunDir, 'out')  # one <idx>.txt per command; report.json only points at it
+[void][System.IO.Directory]::CreateDirectory($__ce.outDir)
+$utf8NoBom    = New-Object System.Text.UTF8Encoding($false)
 
+# One writer per file for the whole session instead of an open/close per line
+$__ce.log = New-Object System.IO.StreamWriter($logPath, $true, $utf8NoBom)
+$__ce.log.AutoFlush = $true
 function LogLine([string]$line) {
-    $entry = ("{0} {1}" -f (Get-Date).ToString('s'), $line)
-    Add-Content -Path $logPath -Value $entry -Encoding utf8
+    $__ce.log.WriteLine([DateTime]::UtcNow.ToString($__ce.logFmt, $__ce.inv) + ' ' + $line)
 }
 
 LogLine "START session=$SessionId"
-$payload = Get-Content -Path $commandsPath -Raw -Encoding utf8 | ConvertFrom-Json
-$results = @()
-
-foreach ($c in $payload.commands) {
-    $started = Get-Date
-    $cmdText = [string]$c.command
-    $wd = $null
-    if ($c.PSObject.Properties.Name -contains 'working_dir') { $wd = $c.working_dir }
-    try {
-        if ($wd -and $wd.Trim().Length -gt 0) { Set-Location -Path $wd }
-        LogLine "CMD $cmdText"
-        $out = Invoke-Expression "$cmdText" 2>&1 | Out-String
-        $results += [PSCustomObject]@{
-            ok          = $true
-            command     = $cmdText
-            working_dir = $wd
-            started_at  = $started.ToString('o')
-            ended_at    = (Get-Date).ToString('o')
-            output      = $out
+$payloadJson = $null
+if ($null -eq $payloadJson) { $payloadJson = [System.IO.File]::ReadAllText($commandsPath, $utf8NoBom) }
+$payload = $payloadJson | ConvertFrom-Json
+if (-not $ErrorStrategy) { $ErrorStrategy = if ($payload.error_strategy) { $payload.error_strategy } else { 'continue' } }
+$__ce.strategy = $ErrorStrategy
+
+# report.json is streamed: header now, one result object per command as it
+# finishes, totals last; no in-memory results array or whole-report JSON.
+$__ce.report = New-Object System.IO.StreamWriter($reportPath, $false, $utf8NoBom)
+$__ce.report.Write('{"session_id":' + ($SessionId | ConvertTo-Json -Compress) +
+                   ',"started_at":"' + $globalStart + '","results":[')
+$__ce.first = $true
+$__ce.failed = 0
+$__ce.sbCache = @{}  # command text -> compiled scriptblock; repeated commands parse once
+
+function WriteResult($result) {
+    if (-not $__ce.first) { $__ce.report.Write(',') }
+    $__ce.first = $false
+    # Results are flat (scalars + output_path); -Depth 4 leaves headroom
+    # without walking deep object graphs
+    $__ce.report.Write(($result | ConvertTo-Json -Depth 4 -Compress))
+    $__ce.report.Flush()
+}
+
+try {
+    if ($__ce.strategy -eq 'parallel' -and $PSVersionTable.PSVersion.Major -ge 7) {
+        # Opt-in: commands are independent, so run them in parallel runspaces
+        # (each with its own location and variables). Results stream back to
+        # this thread in completion order and are logged/written here.
+        $cmds = @($payload.commands)
+        $inv = $__ce.inv      # $using: takes plain variables only
+        $tsFmt = $__ce.tsFmt
+        $outDir = $__ce.outDir
+        @(if ($cmds.Count) { 0..($cmds.Count - 1) }) | ForEach-Object -ThrottleLimit 8 -Parallel {
+            $ErrorActionPreference = 'Stop'
+            $ProgressPreference = 'SilentlyContinue'
+            $inv = $using:inv
+            $tsFmt = $using:tsFmt
+            $idx = $_
+            $c = ($using:cmds)[$idx]
+            $started = [DateTime]::UtcNow.ToString($tsFmt, $inv)
+            $cmdText = [string]$c.command
+            $wd = $c.working_dir
+            try {
+                if ($wd -and $wd.Trim()) { Microsoft.PowerShell.Management\Set-Location -LiteralPath $wd }
+                $outPath = [System.IO.Path]::Combine($using:outDir, "$idx.txt")
+                # & (child scope): runspaces share no variables anyway, and this
+                # keeps the command from overwriting $started/$cmdText/$idx here
+                & ([scriptblock]::Create($cmdText)) 2>&1 |
+                    Microsoft.PowerShell.Utility\Out-File -LiteralPath $outPath -Encoding utf8
+                [PSCustomObject]@{
+                    ok           = $true
+                    command      = $cmdText
+                    working_dir  = $wd
+                    started_at   = $started
+                    ended_at     = [DateTime]::UtcNow.ToString($tsFmt, $inv)
+                    output_path  = "out/$idx.txt"
+                    output_bytes = ([System.IO.FileInfo]$outPath).Length
+                }
+            } catch {
+                [PSCustomObject]@{
+                    ok          = $false
+                    command     = $cmdText
+                    working_dir = $wd
+                    started_at  = $started
+                    ended_at    = [DateTime]::UtcNow.ToString($tsFmt, $inv)
+                    error       = $_.Exception.Message
+                }
+            }
+        } | ForEach-Object {
+            LogLine "CMD $($_.command)"
+            if ($_.ok) { LogLine "OK  $($_.command)" } else { $__ce.failed++; LogLine "FAIL $($_.error)" }
+            WriteResult $_
         }
-        LogLine "OK  $cmdText"
-    } catch {
-        $msg = $_.Exception.Message
-        $results += [PSCustomObject]@{
-            ok          = $false
-            command     = $cmdText
-            working_dir = $wd
-            started_at  = $started.ToString('o')
-            ended_at    = (Get-Date).ToString('o')
-            error       = $msg
+    } else {
+        $__ce.idx = -1
+        foreach ($c in $payload.commands) {
+            $__ce.idx++
+            # Per-command state read back after the command runs stays in $__ce too
+            $__ce.started = [DateTime]::UtcNow.ToString($__ce.tsFmt, $__ce.inv)
+            $__ce.cmd = [string]$c.command
+            $__ce.wd = $c.working_dir  # absent property reads as $null
+            try {
+                if ($__ce.wd -and $__ce.wd.Trim()) { Microsoft.PowerShell.Management\Set-Location -LiteralPath $__ce.wd }
+                LogLine "CMD $($__ce.cmd)"
+                $__ce.sb = $__ce.sbCache[$__ce.cmd]
+                if (-not $__ce.sb) { $__ce.sb = [scriptblock]::Create($__ce.cmd); $__ce.sbCache[$__ce.cmd] = $__ce.sb }
+                # Dot-source, not &: runs in this scope like Invoke-Expression did, so
+                # variables set by one command stay visible to the next. Output is
+                # streamed to out/<idx>.txt rather than held as one string.
+                $__ce.out = [System.IO.Path]::Combine($__ce.outDir, "$($__ce.idx).txt")
+                . $__ce.sb 2>&1 | Microsoft.PowerShell.Utility\Out-File -LiteralPath $__ce.out -Encoding utf8
+                WriteResult ([PSCustomObject]@{
+                    ok           = $true
+                    command      = $__ce.cmd
+                    working_dir  = $__ce.wd
+                    started_at   = $__ce.started
+                    ended_at     = [DateTime]::UtcNow.ToString($__ce.tsFmt, $__ce.inv)
+                    output_path  = "out/$($__ce.idx).txt"
+                    output_bytes = ([System.IO.FileInfo]$__ce.out).Length
+                })
+                LogLine "OK  $($__ce.cmd)"
+            } catch {
+                $__ce.failed++
+                WriteResult ([PSCustomObject]@{
+                    ok          = $false
+                    command     = $__ce.cmd
+                    working_dir = $__ce.wd
+                    started_at  = $__ce.started
+                    ended_at    = [DateTime]::UtcNow.ToString($__ce.tsFmt, $__ce.inv)
+                    error       = $_.Exception.Message
+                })
+                LogLine "FAIL $($_.Exception.Message)"
+                if ($__ce.strategy -eq 'halt') { break }
+            }
         }
-        LogLine "FAIL $msg"
-        if ($ErrorStrategy -eq 'halt') { break }
     }
+} finally {
+    # Always close the JSON document, even if the loop itself blew up
+    $__ce.status = if ($__ce.failed -gt 0) { 'failed' } else { 'success' }
+    $__ce.report.Write('],"failed":' + $__ce.failed + ',"status":"' + $__ce.status +
+                       '","ended_at":"' + [DateTime]::UtcNow.ToString($__ce.tsFmt, $__ce.inv) + '"}')
+    $__ce.report.Dispose()
+    LogLine "END status=$($__ce.status)"
+    $__ce.log.Dispose()
 }
+exit $(if ($__ce.failed -gt 0) { 1 } else { 0 })
+"""
+_RUN_PS1_BYTES: bytes = _RUN_PS1_TEMPLATE.replace("\n", os.linesep).encode("utf-8")
+RUN_PS1_DIGEST = hashlib.sha256(_RUN_PS1_BYTES).hexdigest()[:16]
+# As written, run.ps1 reads commands.json; a self-contained copy swaps this
+# line for a here-string holding the payload.
+_PAYLOAD_LINE = b"$payloadJson = $null"
+_RUN_PS1_HEAD, _RUN_PS1_TAIL = _RUN_PS1_BYTES.split(_PAYLOAD_LINE)
 
-$failed = @($results | Where-Object { $_.ok -ne $true }).Count  # @() forces array context
-$status = if ($failed -gt 0) { 'failed' } else { 'success' }
-$report = [PSCustomObject]@{
-    session_id = $SessionId
-    status     = $status
-    started_at = $globalStart.ToString('o')
-    ended_at   = (Get-Date).ToString('o')
-    failed     = $failed
-    results    = $results
-}
-$report | ConvertTo-Json -Depth 8 | Set-Content -Path $reportPath -Encoding utf8
-LogLine "END status=$status"
-exit $(if ($failed -gt 0) { 1 } else { 0 })
-""", encoding="utf-8")
-    return ps1
+_RUN_BAT_TEMPLATE = string.Template((
+    "@echo off\n"
+    "setlocal\n"
+    "set RUNDIR=$run_dir\n"
+    "set SESSIONID=$session_id\n"
+    "set ERRORSTRATEGY=$error_strategy\n"
+    "$powershell_exe -NoProfile -ExecutionPolicy Bypass "
+    "-File \"%RUNDIR%\\run.ps1\" "
+    "-RunDir \"%RUNDIR%\" "
+    "-SessionId \"%SESSIONID%\" "
+    "-ErrorStrategy \"%ERRORSTRATEGY%\"\n"
+    "exit /b %ERRORLEVEL%\n"
+).replace("\n", os.linesep))
+
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def _flush_session_files(files: List[Tuple[str, bytes]]) -> None:
+    """
+    Write each (path, bytes) pair with raw open/write/close — no pathlib
+    stat/encode layers — back to back, so a session's files land together.
+    """
+    for path, data in files:
+        fd = os.open(path, _WRITE_FLAGS, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+
+
+def new_session_id() -> str:
+    return secrets.token_hex(5)  # 10 hex chars, same 40 bits as uuid4().hex[:10]
+
+
+@functools.lru_cache(maxsize=32)
+def _resolved(base: Path) -> str:
+    return str(base.resolve())
+
+
+def ensure_run_dir(runs_dir: Path, session_id: str) -> Path:
+    # Base resolved once per runs_dir; the session part is joined and
+    # normalized as a string (no realpath walk), then created with a single
+    # makedirs. Path only at the return, for callers.
+    d = os.path.normpath(os.path.join(_resolved(runs_dir), session_id))
+    os.makedirs(d, exist_ok=True)
+    return Path(d)
+
+
+@functools.lru_cache(maxsize=8)
+def cached_run_ps1(runs_dir: Path) -> Path:
+    """
+    run.ps1 at a stable, content-addressed path (runs_dir/.cache/run-<digest>.ps1),
+    written once per template version. PowerShell caches a script's parsed
+    form by path + contents, so a resident host (hosted_runspace.py) that
+    always runs this copy parses it once instead of once per session dir.
+    """
+    cache_dir = os.path.join(_resolved(runs_dir), ".cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    ps1 = os.path.join(cache_dir, f"run-{RUN_PS1_DIGEST}.ps1")
+    if not os.path.exists(ps1):
+        _flush_session_files([(ps1, _RUN_PS1_BYTES)])
+    return Path(ps1)
+
+
+# ─── Builders (pure: session args → file bytes) ───────────────────────────────
+
+def _build_commands_bytes(payload: dict) -> bytes:
+    """Indented JSON bytes for commands.json (run.ps1 reads it back as UTF-8)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+    return json.dumps(payload, indent=2).encode("utf-8")
+
+
+def _build_run_ps1_bytes(payload: Optional[dict] = None) -> bytes:
+    """
+    run.ps1 bytes; with payload, a self-contained script that embeds it
+    instead of reading commands.json. The JSON is single-line and
+    ASCII-escaped, so it can't close the here-string early and reads the
+    same under Windows PowerShell's ANSI decoding of BOM-less scripts.
+    """
+    if payload is None:
+        return _RUN_PS1_BYTES
+    nl = os.linesep.encode("ascii")
+    embedded = json.dumps(payload, separators=(",", ":")).encode("ascii")
+    return b"".join((_RUN_PS1_HEAD, b"$payloadJson = @'", nl, embedded, nl, b"'@", _RUN_PS1_TAIL))
+
+
+def _build_run_bat_bytes(run_dir: str, session_id: str, error_strategy: str, powershell_exe: str) -> bytes:
+    text = _RUN_BAT_TEMPLATE.substitute(
+        run_dir=run_dir,
+        session_id=session_id,
+        error_strategy=error_strategy,
+        powershell_exe=powershell_exe,
+    )
+    try:
+        return text.encode("ascii")  # the usual case: no codec work beyond a copy
+    except UnicodeEncodeError:
+        return text.encode("utf-8")  # non-ASCII run dir / exe path, as before
+
+
+# ─── Writers ──────────────────────────────────────────────────────────────────
+
+def write_session(run_dir: Path, payload: dict, session_id: str,
+                  error_strategy: str, powershell_exe: str,
+                  with_bat: bool = True, embed_payload: bool = True) -> Tuple[Optional[str], str, Optional[str]]:
+    """
+    Build the session files in memory, then write them back to back: run.ps1
+    with the payload embedded (embed_payload=False: generic run.ps1 plus
+    commands.json, as hosted mode needs) and, unless with_bat=False, run.bat.
+    Returns (commands_json or None, run_ps1, run_bat or None) as path
+    strings. Without the shim, launch with ps1_argv().
+    """
+    rd = os.fspath(run_dir)
+    join = os.path.join
+    files = []
+    commands_json = bat = None
+    if embed_payload:
+        ps1 = join(rd, "run.ps1")
+        files.append((ps1, _build_run_ps1_bytes(payload)))
+    else:
+        commands_json, ps1 = join(rd, "commands.json"), join(rd, "run.ps1")
+        files.append((commands_json, _build_commands_bytes(payload)))
+        files.append((ps1, _build_run_ps1_bytes()))
+    if with_bat:
+        bat = join(rd, "run.bat")
+        files.append((bat, _build_run_bat_bytes(rd, session_id, error_strategy, powershell_exe)))
+    _flush_session_files(files)
+    return commands_json, ps1, bat
+
+
+def ps1_argv(run_dir: Path, session_id: str, error_strategy: Optional[str], powershell_exe: str) -> List[str]:
+    """
+    The command line run.bat would run, for launching run.ps1 directly (no
+    cmd.exe hop). error_strategy=None leaves it to the payload's own.
+    """
+    rd = os.fspath(run_dir)
+    argv = [
+        powershell_exe, "-NoProfile", "-ExecutionPolicy", "Bypass",
+        "-File", os.path.join(rd, "run.ps1"),
+        "-RunDir", rd,
+        "-SessionId", session_id,
+    ]
+    if error_strategy is not None:
+        argv += ["-ErrorStrategy", error_strategy]
+    return argv
+
+
+def write_commands_json(run_dir: Path, payload: dict) -> Path:
+    p = os.path.join(run_dir, "commands.json")
+    _flush_session_files([(p, _build_commands_bytes(payload))])
+    return Path(p)
+
+
+def write_ps1(run_dir: Path, payload: Optional[dict] = None) -> Path:
+    """Write run.ps1 — loads the payload (embedded, else commands.json), executes (sequentially unless strategy is parallel), writes report.json + run.log."""
+    ps1 = os.path.join(run_dir, "run.ps1")
+    _flush_session_files([(ps1, _build_run_ps1_bytes(payload))])
+    return Path(ps1)
 
 
 def write_bat(run_dir: Path, session_id: str, error_strategy: str, powershell_exe: str) -> Path:
     """Write run.bat — the Windows-native filter shim that calls run.ps1."""
-    bat = run_dir / "run.bat"
-    bat.write_text(
-        f"@echo off\n"
-        f"setlocal\n"
-        f"set RUNDIR={run_dir}\n"
-        f"set SESSIONID={session_id}\n"
-        f"set ERRORSTRATEGY={error_strategy}\n"
-        f"{powershell_exe} -NoProfile -ExecutionPolicy Bypass "
-        f"-File \"%RUNDIR%\\run.ps1\" "
-        f"-RunDir \"%RUNDIR%\" "
-        f"-SessionId \"%SESSIONID%\" "
-        f"-ErrorStrategy \"%ERRORSTRATEGY%\"\n"
-        f"exit /b %ERRORLEVEL%\n",
-        encoding="utf-8"
-    )
-    return bat
+    bat = os.path.join(run_dir, "run.bat")
+    _flush_session_files([(bat, _build_run_bat_bytes(os.fspath(run_dir), session_id, error_strategy, powershell_exe))])
+    return Path(bat)
@@ -0,0 +1,79 @@
+"""
+HostedRunspace: concurrent sessions share one resident process.
+Run with: python -m unittest discover -s tests
+"""
+import asyncio
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from powershell_bridge import hosted_runspace
+from powershell_bridge.hosted_runspace import HostedRunspace
+
+
+class _FakeStdin:
+    def __init__(self, proc):
+        self._proc = proc
+
+    def write(self, data: bytes) -> None:
+        self._proc.requests.append(data)
+        self._proc.replies.put_nowait(b'{"rc":0}\n')
+
+    async def drain(self) -> None:
+        await asyncio.sleep(0)
+
+    def close(self) -> None:
+        self._proc.returncode = 0
+
+
+class _FakeStdout:
+    def __init__(self, proc):
+        self._proc = proc
+
+    async def readline(self) -> bytes:
+        return await self._proc.replies.get()
+
+
+class _FakeProcess:
+    def __init__(self):
+        self.returncode = None
+        self.requests = []
+        self.replies: asyncio.Queue = asyncio.Queue()
+        self.stdin = _FakeStdin(self)
+        self.stdout = _FakeStdout(self)
+
+    def kill(self) -> None:
+        self.returncode = -9
+
+    async def wait(self) -> int:
+        return self.returncode
+
+
+class HostedRunspaceTest(unittest.TestCase):
+    def test_concurrent_runs_spawn_one_process(self):
+        spawned = []
+
+        async def fake_exec(*args, **kwargs):
+            await asyncio.sleep(0.01)  # spawn takes a while; other callers arrive meanwhile
+            proc = _FakeProcess()
+            spawned.append(proc)
+            return proc
+
+        async def scenario():
+            host = HostedRunspace("pwsh")
+            with mock.patch.object(hosted_runspace.asyncio, "create_subprocess_exec", fake_exec):
+                rcs = await asyncio.gather(*(
+                    host.run(Path(f"/runs/s{i}"), f"s{i}", "continue", timeout_s=5)
+                    for i in range(4)
+                ))
+            await host.close()
+            return rcs
+
+        rcs = asyncio.run(scenario())
+        self.assertEqual(rcs, [0, 0, 0, 0])
+        self.assertEqual(len(spawned), 1)
+        self.assertEqual(len(spawned[0].requests), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()